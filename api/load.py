@@ -1,20 +1,44 @@
-import concurrent
+import argparse
+import asyncio
 import csv
+import io
 import logging
-from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, List, Optional
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
-import requests
 from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm.decl_api import DeclarativeMeta
 from sqlalchemy.orm.session import Session
+from starlette.concurrency import run_in_threadpool
 
-from api.utils import nimbus
-from api.utils.database import SessionLocal
+from api.utils import metrics, migrations, models, nimbus
+from api.utils.cache import search_cache
+from api.utils.database import SessionLocal, engine
 from api.utils.models import Contact
 
 logger = logging.getLogger(__name__)
 
+CSV_FILENAME = "api/data/contacts.csv"
+CSV_COLUMNS = ("first_name", "last_name", "email", "description")
+DEFAULT_CHUNK_SIZE = 10_000
+
+# Chunks are copied into a session-local staging table first, then moved into
+# Contact with ON CONFLICT DO NOTHING, so emails already stored are skipped
+STAGING_TABLE = "contact_import"
+CREATE_STAGING_SQL = (
+    f"CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} "
+    f"({', '.join(f'{column} text' for column in CSV_COLUMNS)}) "
+    f"ON COMMIT DELETE ROWS"
+)
+COPY_CONTACTS_SQL = (
+    f'COPY {STAGING_TABLE} ({", ".join(CSV_COLUMNS)}) FROM STDIN WITH CSV'
+)
+INSERT_STAGED_SQL = (
+    f'INSERT INTO "{Contact.__tablename__}" ({", ".join(CSV_COLUMNS)}) '
+    f'SELECT {", ".join(CSV_COLUMNS)} FROM {STAGING_TABLE} ON CONFLICT DO NOTHING'
+)
+
 
 def table_exists(table: DeclarativeMeta, session: Session) -> bool:
     """Check if table exists in database
@@ -43,53 +67,165 @@ def table_has_records(table: DeclarativeMeta, session: Session) -> bool:
     return session.query(table).count() > 0
 
 
-def load_csv_data(filename: str) -> List[Dict[str, str]]:
-    """Load data from CSV file
+def iter_csv_chunks(filename: str, chunk_size: int) -> Iterator[List[Dict[str, str]]]:
+    """Stream rows from a CSV file in fixed-size chunks
 
     Args:
         filename (str): Path to CSV file
+        chunk_size (int): Number of rows per chunk
+
+    Yields:
+        Iterator[List[Dict[str, str]]]: Chunks of rows from the CSV file
+    """
+
+    with open(filename, mode="r", newline="") as file:
+        chunk = []
+        for row in csv.DictReader(file):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+
+        if chunk:
+            yield chunk
+
+
+def copy_contacts(cursor: Any, rows: List[Dict[str, str]]) -> int:
+    """Load a chunk of contact rows with PostgreSQL COPY
+
+    Rows whose email already exists, in the table or earlier in the chunk, are
+    skipped. The staging table must exist, see CREATE_STAGING_SQL.
+
+    Args:
+        cursor (Any): psycopg2 cursor
+        rows (List[Dict[str, str]]): Rows to load, empty values are stored as NULL
 
     Returns:
-        List[Dict[str, str]]: List of dictionaries containing data from CSV file
+        int: Number of contacts inserted
     """
 
-    with open(filename, mode="r") as file:
-        csv_reader = csv.DictReader(file)
-        return [row for row in csv_reader]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([row.get(column) or None for column in CSV_COLUMNS])
 
+    buffer.seek(0)
+    cursor.copy_expert(COPY_CONTACTS_SQL, buffer)
+    cursor.execute(INSERT_STAGED_SQL)
 
-def enrich_contact(contact: Contact, session: requests.Session) -> Contact:
-    """Enrich contact with data from Nimbus
+    return cursor.rowcount
+
+
+def bulk_import_csv(
+    filename: str = CSV_FILENAME,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    bind: Engine = engine,
+) -> Dict[str, float]:
+    """Stream a CSV file into the Contact table using COPY
+
+    Every chunk is committed on its own, so memory stays flat regardless of the
+    file size. search_vector is a generated column, so PostgreSQL fills it while
+    copying and no Python code runs per row. Contacts whose email is already
+    stored are skipped, so importing the same file twice is harmless.
 
     Args:
-        contact (Contact): Contact to enrich
-        session (requests.Session): HTTP request session
+        filename (str): Path to CSV file. Defaults to CSV_FILENAME.
+        chunk_size (int): Number of rows per COPY. Defaults to DEFAULT_CHUNK_SIZE.
+        bind (Engine): SQLAlchemy engine. Defaults to the application engine.
 
     Returns:
-        Contact: Enriched contact, updated nimbus_id field if found
+        Dict[str, float]: Rows read, contacts inserted, elapsed seconds and rows
+            per second
     """
 
-    api = nimbus.NimbusAPIClient(session)
+    started = time.perf_counter()
+    total = 0
+    inserted = 0
 
-    if contact.email:
-        query = {"email": {"is": contact.email}}
-        logger.info(f"Searching for contact with email: {contact.email}")
+    connection = bind.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(CREATE_STAGING_SQL)
 
-        response: Optional[nimbus.NimbusContactsResponse] = api.list_contacts(
-            query=query
-        )
+        for chunk in iter_csv_chunks(filename, chunk_size):
+            count = copy_contacts(cursor, chunk)
+            connection.commit()
+
+            total += len(chunk)
+            inserted += count
+            metrics.IMPORTED_CONTACTS.inc(count)
+            elapsed = time.perf_counter() - started
+            logger.info(f"[+] Copied {total} contacts ({total / elapsed:.0f} rows/sec)")
+
+        cursor.close()
+    finally:
+        connection.close()
+
+    search_cache.invalidate()
+
+    elapsed = time.perf_counter() - started
+    metrics.IMPORT_SECONDS.observe(elapsed)
+    stats = {
+        "rows": total,
+        "inserted": inserted,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(total / elapsed, 1) if elapsed else 0.0,
+    }
+    logger.info(
+        f"[+] Imported {stats['inserted']} of {stats['rows']} contacts in "
+        f"{stats['seconds']}s ({stats['rows_per_second']} rows/sec)"
+    )
+
+    return stats
 
-        if response and response.meta["total"] > 0:  # type: ignore
-            contact.nimbus_id = response.resources[0].id
-            logger.info(
-                f"Found contact with email: {contact.email}, nimbus_id: {contact.nimbus_id}"
-            )
 
-    return contact
+async def enrich_contacts(
+    contacts: Sequence[Any], api: nimbus.AsyncNimbusAPIClient
+) -> Tuple[Dict[int, str], List[Any]]:
+    """Look up the Nimbus ids of contacts by email
+
+    Emails are resolved in batches of nimbus.BATCH_SIZE with one compound query
+    per batch, and the batches are requested concurrently.
+
+    Args:
+        contacts (Sequence[Any]): Contacts or rows with id and email
+        api (nimbus.AsyncNimbusAPIClient): Shared Nimbus API client
+
+    Returns:
+        Tuple[Dict[int, str], List[Any]]: Nimbus ids found, by local contact id,
+            and the contacts whose batch failed
+    """
+
+    batches = list(nimbus.batched([c for c in contacts if c.email]))
+    results = await asyncio.gather(
+        *(api.resolve_emails([c.email for c in batch]) for batch in batches)
+    )
+    nimbus_ids: Dict[int, str] = {}
+    failed: List[Any] = []
+
+    for batch, matches in zip(batches, results):
+        if matches is None:
+            logger.warning(f"[!] Unable to resolve a batch of {len(batch)} emails")
+            failed.extend(batch)
+            continue
+
+        for contact in batch:
+            remote_contact = matches.get(contact.email.lower())
+            if remote_contact:
+                nimbus_ids[contact.id] = remote_contact.id
+                logger.info(
+                    f"Found contact with email: {contact.email}, nimbus_id: {remote_contact.id}"
+                )
+
+    return nimbus_ids, failed
 
 
 async def import_initial_data() -> None:
-    """Perform initial data import from CSV files"""
+    """Perform initial data import from CSV files
+
+    Only the raw contacts are inserted here. Nimbus enrichment runs afterwards
+    as a background job, so startup does not wait for the remote API.
+    """
 
     with SessionLocal() as db_session:
         if not table_exists(Contact.__table__, db_session):
@@ -102,24 +238,33 @@ async def import_initial_data() -> None:
             )
             return
 
-        logger.info("[+] Loading initial data...")
+    logger.info("[+] Loading initial data...")
+
+    stats = await run_in_threadpool(bulk_import_csv, CSV_FILENAME)
+
+    logger.info(
+        f"[+] Initial data ({stats['rows']}) loaded successfully from CSV files."
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command line entry point for bulk CSV imports
+
+    Args:
+        argv (Optional[List[str]]): Command line arguments. Defaults to sys.argv.
+    """
 
-        contacts_data = load_csv_data("api/data/contacts.csv")
+    parser = argparse.ArgumentParser(description="Bulk import contacts from CSV")
+    parser.add_argument("filename", nargs="?", default=CSV_FILENAME)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
 
-        with requests.Session() as session:
-            with ThreadPoolExecutor(max_workers=10) as executor:
-                futures = []
-                for contact_data in contacts_data:
-                    logger.info(f"[+] Loading contact data: {contact_data}")
-                    contact = Contact(**contact_data)
+    logging.basicConfig(level=logging.INFO)
 
-                    futures.append(executor.submit(enrich_contact, contact, session))
+    models.Base.metadata.create_all(bind=engine)
+    migrations.run_migrations(engine)
+    bulk_import_csv(args.filename, chunk_size=args.chunk_size)
 
-                for future in concurrent.futures.as_completed(futures):
-                    enriched_contact = future.result()
-                    db_session.add(enriched_contact)
 
-        db_session.commit()
-        logger.info(
-            f"[+] Initial data ({len(futures)}) loaded successfully from CSV files."
-        )
+if __name__ == "__main__":
+    main()
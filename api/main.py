@@ -4,7 +4,7 @@ from dotenv import load_dotenv
 from fastapi import FastAPI
 
 from api.routers.base import api_router
-from api.utils import models
+from api.utils import metrics, migrations, models
 from api.utils.database import check_db_connected, check_db_disconnected, engine
 
 load_dotenv()
@@ -15,6 +15,7 @@ logger = logging.getLogger(__name__)
 
 def create_tables() -> None:
     models.Base.metadata.create_all(bind=engine)
+    migrations.run_migrations(engine)
 
 
 def include_routers(app: FastAPI) -> None:
@@ -30,10 +31,22 @@ def start_application() -> FastAPI:
     )
     create_tables()
     include_routers(app)
+    metrics.instrument_app(app)
 
     return app
 
 
+def start_contact_enrichment() -> None:
+    """Queue the background Nimbus enrichment job without waiting for it"""
+
+    from api.tasks import task_enrich_contacts
+
+    try:
+        task_enrich_contacts.delay()
+    except Exception:
+        logger.exception("[-] Unable to queue contact enrichment job")
+
+
 app = start_application()
 
 
@@ -44,6 +57,7 @@ async def app_startup() -> None:
     from api.load import import_initial_data
 
     await import_initial_data()
+    start_contact_enrichment()
 
 
 @app.on_event("shutdown")
@@ -1,20 +1,86 @@
-from typing import List
+from typing import Any, Dict, List, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+import databases
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
 
-from api.utils import schema, search
-from api.utils.database import get_db
+from api.utils import export, schema, search
+from api.utils.database import get_read_database
 
 router = APIRouter()
 
 
-@router.get("/search", response_model=List[schema.Contact])
-def get_search(text: str, db=Depends(get_db)):  # type: ignore
-    """Endpoint to synchronously search contacts"""
+@router.get(
+    "/search", response_model=schema.SearchResults, response_class=ORJSONResponse
+)
+async def get_search(
+    text: str,
+    limit: int = Query(search.DEFAULT_LIMIT, ge=1, le=search.MAX_LIMIT),
+    cursor: Optional[str] = None,
+    db: databases.Database = Depends(get_read_database),
+) -> ORJSONResponse:
+    """Endpoint to search contacts on the shared async database pool
 
-    results = search.full_text_search(session=db, text=text)
+    `text` supports web search syntax ("quoted phrases", OR, -excluded) and
+    field terms such as `email:foo` or `name:"van der"`. Results are ordered by
+    rank. Pass the returned `next_cursor` as `cursor` to fetch the next page.
+    """
 
-    if not results:
+    try:
+        page = await search.async_full_text_search(
+            db=db, text=text, limit=limit, cursor=cursor
+        )
+    except search.InvalidCursor as e:
+        raise HTTPException(400, detail={"error": str(e)})
+
+    if not page["results"]:
         raise HTTPException(404, detail={"error": "Contact not found"})
 
-    return [dict(row) for row in results]
+    # The page is built from plain column values, so it is encoded directly
+    # instead of being validated row by row against response_model
+    return ORJSONResponse(page)
+
+
+@router.get("/suggest", response_model=List[schema.Suggestion])
+async def get_suggest(
+    q: str = Query(..., min_length=search.MIN_SUGGEST_LENGTH, max_length=100),
+    limit: int = Query(search.SUGGEST_LIMIT, ge=1, le=search.MAX_SUGGEST_LIMIT),
+    db: databases.Database = Depends(get_read_database),
+) -> List[Dict[str, Any]]:
+    """Endpoint for search-as-you-type on names and email prefixes
+
+    Returns an empty list rather than 404 when nothing matches.
+    """
+
+    return await search.async_suggest(db=db, prefix=q, limit=limit)
+
+
+@router.get(
+    "/contacts/export",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {"application/x-ndjson": {}, "text/csv": {}},
+            "description": "Every contact, one per line",
+        }
+    },
+)
+async def get_contacts_export(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    db: databases.Database = Depends(get_read_database),
+) -> StreamingResponse:
+    """Endpoint to download the whole contact book
+
+    Contacts are streamed from a server-side cursor in id order, so memory use
+    does not grow with the size of the book. The CSV format uses the same
+    header as the import file.
+    """
+
+    if format == "csv":
+        return StreamingResponse(
+            export.iter_csv(db),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="contacts.csv"'},
+        )
+
+    return StreamingResponse(export.iter_ndjson(db), media_type="application/x-ndjson")
@@ -1,16 +1,124 @@
-from fastapi import APIRouter
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, Optional
+
+from celery import states
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
 
 from api import tasks
-from api.utils import schema
+from api.utils import models, schema, search
+from api.utils.cache import get_async_redis
+from api.utils.database import get_db
 
 router = APIRouter()
 
+STREAM_HEARTBEAT_SECONDS = 15.0
+STREAM_TIMEOUT_SECONDS = 300.0
+
+
+def task_result_response(state: str, result: Any) -> Dict[str, Any]:
+    """Build the TaskResult payload for a search task
+
+    Args:
+        state (str): Celery task state
+        result (Any): Task result, or the exception of a failed task
+
+    Returns:
+        Dict[str, Any]: TaskResult compatible dictionary
+    """
+
+    if state == states.PENDING:
+        return {"state": state, "status": "Task is pending!"}
+
+    if state in states.EXCEPTION_STATES:
+        return {"state": state, "status": str(result)}
+
+    page = result or {}
+    return {
+        "state": state,
+        "result": page.get("results", []),
+        "next_cursor": page.get("next_cursor"),
+    }
+
+
+def server_sent_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event
+
+    Args:
+        event (str): Event name
+        data (Dict[str, Any]): Event payload
+
+    Returns:
+        str: Serialized event
+    """
+
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def task_result_events(task_id: str) -> AsyncIterator[str]:
+    """Wait for a search task to finish and push its result
+
+    The Celery Redis result backend publishes every stored task state on a
+    channel named after the result key. The stream subscribes to that channel
+    before reading the key, so a result stored in between is not missed. While
+    waiting, comments are sent as heartbeats to keep proxies from closing the
+    connection.
+
+    Args:
+        task_id (str): Celery task id
+
+    Yields:
+        AsyncIterator[str]: Server-Sent Events
+    """
+
+    backend = tasks.celery.backend
+    key = backend.get_key_for_task(task_id).decode()
+    redis = get_async_redis()
+    deadline = asyncio.get_running_loop().time() + STREAM_TIMEOUT_SECONDS
+
+    async with redis.pubsub() as pubsub:
+        await pubsub.subscribe(key)
+        raw = await redis.get(key)
+
+        while True:
+            if raw is not None:
+                meta = backend.decode_result(raw)
+                if meta["status"] in states.READY_STATES:
+                    yield server_sent_event(
+                        "result", task_result_response(meta["status"], meta["result"])
+                    )
+                    return
+
+            if asyncio.get_running_loop().time() > deadline:
+                yield server_sent_event("timeout", {"task_id": task_id})
+                return
+
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=STREAM_HEARTBEAT_SECONDS
+            )
+            if message is None:
+                raw = None
+                yield ": keep-alive\n\n"
+            else:
+                raw = message["data"]
+
 
 @router.get("/search", response_model=schema.TaskStatus)
-def get_search(text: str):  # type: ignore
+def get_search(
+    text: str,
+    limit: int = Query(search.DEFAULT_LIMIT, ge=1, le=search.MAX_LIMIT),
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
     """Endpoint to asynchronously search contacts"""
 
-    task = tasks.task_full_text_search.apply_async(args=[text])
+    if cursor:
+        try:
+            search.decode_cursor(cursor)
+        except search.InvalidCursor as e:
+            raise HTTPException(400, detail={"error": str(e)})
+
+    task = tasks.task_full_text_search.apply_async(args=[text, limit, cursor])
 
     return {"task_id": task.id, "task_status": task.state}
 
@@ -19,18 +127,53 @@ def get_search(text: str):  # type: ignore
     "/search/status/{task_id}",
     response_model=schema.TaskResult,
     response_model_exclude_none=True,
+    response_class=ORJSONResponse,
 )
-def get_task_status(task_id: str):  # type: ignore
+def get_task_status(task_id: str) -> ORJSONResponse:
     """Endpoint to get the status of a task and results if completed"""
 
     task = tasks.task_full_text_search.AsyncResult(task_id)
+    payload = task_result_response(task.state, task.result)
+
+    return ORJSONResponse(
+        {key: value for key, value in payload.items() if value is not None}
+    )
+
+
+@router.get(
+    "/search/stream/{task_id}",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {"text/event-stream": {}},
+            "description": "A `result` event with a TaskResult payload, "
+            "or a `timeout` event",
+        }
+    },
+)
+async def stream_task_result(task_id: str) -> StreamingResponse:
+    """Endpoint that pushes the result of a search task once it is ready
+
+    Alternative to polling /search/status/{task_id}: the connection stays open
+    and receives a single `result` event when the task completes.
+    """
+
+    return StreamingResponse(
+        task_result_events(task_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/enrichment/status", response_model=schema.JobState)
+def get_enrichment_status(db=Depends(get_db)):  # type: ignore
+    """Endpoint to get the progress of the background Nimbus enrichment job
+
+    Before the job has stored a checkpoint, an empty state is returned.
+    """
 
-    if task.state == "PENDING":
-        response = {"state": task.state, "status": "Task is pending!"}
-    elif task.state != "FAILURE":
-        response = {"state": task.state, "result": task.result or []}
-    else:
-        # task failed
-        response = {"state": task.state, "status": str(task.info)}
+    job = db.get(models.JobState, tasks.ENRICHMENT_JOB)
+    if job is None:
+        return {"name": tasks.ENRICHMENT_JOB, "state": {}}
 
-    return response
+    return job
@@ -1,111 +1,1011 @@
+import asyncio
 import logging
-from concurrent import futures
-from typing import List, Optional
+import math
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
-import requests
-from celery import Celery, Task
+from celery import Celery, Task, chord
 from celery.schedules import crontab
+from celery.signals import task_postrun, task_prerun, worker_init, worker_process_init
+from redis.exceptions import LockError
+from redis.lock import Lock
+from sqlalchemy.orm import Session
 
-from api.utils import crud, models, nimbus, search
-from api.utils.database import SessionLocal
+from api import load
+from api.utils import crud, metrics, models, nimbus, search, throttle
+from api.utils.cache import REDIS_URL, get_redis, search_cache
+from api.utils.database import ReadSessionLocal, SessionLocal, engine, read_engine
 
 logger = logging.getLogger(__name__)
 
 app_name = "contacts-tasks-app"
-broker_url = "redis://redis:6379/0"
-result_backend = "redis://redis:6379/0"
+broker_url = REDIS_URL
+result_backend = REDIS_URL
 include = ["api.tasks"]
 
 celery = Celery(app_name, broker=broker_url, backend=result_backend, include=include)
 
+# Interactive searches and long-running jobs are consumed by separate workers,
+# so a nightly sync cannot hold up a user's search
+SEARCH_QUEUE = "search"
+SYNC_QUEUE = "sync"
+
+celery.conf.task_default_queue = SYNC_QUEUE
+celery.conf.task_routes = {
+    "api.tasks.task_full_text_search": {"queue": SEARCH_QUEUE},
+    "api.tasks.task_enrich_contacts": {"queue": SYNC_QUEUE},
+    "api.tasks.task_update_contacts": {"queue": SYNC_QUEUE},
+    "api.tasks.task_sync_shard": {"queue": SYNC_QUEUE},
+    "api.tasks.task_finish_sync": {"queue": SYNC_QUEUE},
+    "api.tasks.task_retry_contacts": {"queue": SYNC_QUEUE},
+}
+
+ENRICHMENT_JOB = "enrich-contacts"
+ENRICHMENT_CHUNK_SIZE = 500
+ENRICHMENT_LOCK_TIMEOUT_SECONDS = 600
+
+SYNC_JOB = "nimbus-sync"
+SYNC_CHUNK_SIZE = 1000
+# Local columns updated from the Nimbus fields of the same record
+SYNCED_FIELDS = {
+    "first_name": "first name",
+    "last_name": "last name",
+    "email": "email",
+}
+# Re-read a small window before the watermark to tolerate clock skew
+SYNC_WATERMARK_OVERLAP = timedelta(minutes=5)
+# The full reconcile is split into id ranges synced by separate shard tasks, so
+# every sync worker takes part in it
+SYNC_SHARDS = int(os.getenv("SYNC_SHARDS", "8"))
+# Held from the start of a run until its last shard is done. The timeout only
+# matters if a worker dies before the lock is released.
+SYNC_LOCK_KEY = f"{SYNC_JOB}:lock"
+SYNC_LOCK_TIMEOUT_SECONDS = int(os.getenv("SYNC_LOCK_TIMEOUT_SECONDS", "21600"))
+
+# Contacts whose Nimbus lookup failed, retried by task_retry_contacts
+RETRY_QUEUE_KEY = f"{SYNC_JOB}:retry"
+RETRY_BATCH_SIZE = 1000
+
+# Shared by every task run of a worker process, so a Nimbus outage seen by one
+# run also stops the next one from calling it
+nimbus_breaker = throttle.CircuitBreaker()
+
+# Start times of the tasks running in this process, by task id
+task_started_at: Dict[str, float] = {}
+
+
+@worker_init.connect
+def start_metrics_exporter(**kwargs: Any) -> None:
+    metrics.start_worker_exporter()
+
+
+@worker_process_init.connect
+def warm_database_pool(**kwargs: Any) -> None:
+    """Give every worker process its own pool and open a connection up front
+
+    Connections inherited from the parent through fork are dropped without
+    being closed, so the parent's sockets are left alone. The session factories
+    keep using the process pool, so later tasks reuse an open connection.
+    """
+
+    for process_engine in {engine, read_engine}:
+        process_engine.dispose(close=False)
+
+    try:
+        with read_engine.connect():
+            pass
+    except Exception:
+        logger.exception("[-] Unable to open a database connection")
+
+
+@task_prerun.connect
+def start_task_timer(task_id: str, **kwargs: Any) -> None:
+    task_started_at[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def record_task_duration(
+    task_id: str, task: Task, state: Optional[str] = None, **kwargs: Any
+) -> None:
+    started = task_started_at.pop(task_id, None)
+    if started is not None:
+        metrics.TASK_SECONDS.labels(task.name, state or "UNKNOWN").observe(
+            time.perf_counter() - started
+        )
+
+
+@contextmanager
+def nimbus_event_loop() -> (
+    Iterator[Tuple[asyncio.AbstractEventLoop, nimbus.AsyncNimbusAPIClient]]
+):
+    """Event loop and pooled, cached async Nimbus client for a task run
+
+    The client draws from the rate limit shared by all workers and reports to
+    the circuit breaker of this process.
+
+    Yields:
+        Iterator[Tuple[asyncio.AbstractEventLoop, nimbus.AsyncNimbusAPIClient]]:
+            Event loop and the client bound to it
+    """
+
+    loop = asyncio.new_event_loop()
+    cache = nimbus.NimbusResponseCache(redis_url=nimbus.NIMBUS_CACHE_REDIS_URL)
+    limiter = throttle.TokenBucket(
+        "nimbus",
+        rate=throttle.NIMBUS_RATE_LIMIT,
+        capacity=throttle.NIMBUS_RATE_BURST,
+        redis_url=throttle.NIMBUS_RATE_LIMIT_REDIS_URL,
+    )
+    client = nimbus.AsyncNimbusAPIClient(
+        cache=cache, limiter=limiter, breaker=nimbus_breaker
+    )
+    try:
+        yield loop, client
+    finally:
+        loop.run_until_complete(client.aclose())
+        loop.close()
+
+
+def defer_contacts(contact_ids: Iterable[int]) -> int:
+    """Put contacts whose Nimbus lookup failed on the retry queue
+
+    Args:
+        contact_ids (Iterable[int]): Local contact ids
+
+    Returns:
+        int: Number of contacts deferred
+    """
+
+    contact_ids = list(contact_ids)
+    if contact_ids:
+        get_redis().sadd(RETRY_QUEUE_KEY, *contact_ids)
+        logger.warning(f"[!] Deferred {len(contact_ids)} contacts to a later retry")
+
+    return len(contact_ids)
+
+
+async def fetch_remote_contacts(
+    client: nimbus.AsyncNimbusAPIClient, contacts: Sequence[Any]
+) -> Tuple[Dict[int, nimbus.NimbusContact], List[int]]:
+    """Look up the Nimbus records of local contacts in batches
+
+    Contacts already linked are resolved by nimbus_id, the rest by email. Every
+    batch is a single request and the batches run concurrently.
+
+    Args:
+        client (nimbus.AsyncNimbusAPIClient): Shared Nimbus API client
+        contacts (Sequence[Any]): Local contacts or rows with id, nimbus_id and email
+
+    Returns:
+        Tuple[Dict[int, nimbus.NimbusContact], List[int]]: Remote records by
+            local contact id, and the ids of the contacts whose batch failed
+    """
+
+    by_id = [c for c in contacts if c.nimbus_id]
+    by_email = [c for c in contacts if not c.nimbus_id and c.email]
+
+    id_batches = list(nimbus.batched(by_id))
+    email_batches = list(nimbus.batched(by_email))
+
+    results = await asyncio.gather(
+        *(client.resolve_ids([c.nimbus_id for c in batch]) for batch in id_batches),
+        *(client.resolve_emails([c.email for c in batch]) for batch in email_batches),
+    )
+
+    remote_contacts: Dict[int, nimbus.NimbusContact] = {}
+    failed: List[int] = []
+    batches = [(batch, "nimbus_id") for batch in id_batches] + [
+        (batch, "email") for batch in email_batches
+    ]
+
+    for (batch, key), matches in zip(batches, results):
+        if matches is None:
+            logger.warning(f"[!] Unable to resolve a batch of {len(batch)} contacts")
+            failed.extend(contact.id for contact in batch)
+            continue
+
+        for contact in batch:
+            value = getattr(contact, key)
+            remote_contact = matches.get(value.lower() if key == "email" else value)
+            if remote_contact:
+                remote_contacts[contact.id] = remote_contact
+
+    return remote_contacts, failed
+
+
+def remote_contact_values(remote_contact: nimbus.NimbusContact) -> Dict[str, str]:
+    """Extract the Nimbus id and the synced fields present on a Nimbus record
+
+    Args:
+        remote_contact (nimbus.NimbusContact): Nimbus record
+
+    Returns:
+        Dict[str, str]: Local column values taken from the record
+    """
+
+    values = {"nimbus_id": remote_contact.id}
+
+    for column, field in SYNCED_FIELDS.items():
+        value = nimbus.field_value(remote_contact, field)
+        if value:
+            values[column] = value
+
+    return values
+
+
+def changed_values(
+    local_values: Mapping[str, Any], remote_contact: nimbus.NimbusContact
+) -> Optional[Dict[str, Any]]:
+    """Merge a Nimbus record into the values of a local contact, if it changes them
+
+    The hash of the merged values is compared with the sync_hash stored on the
+    row, so unchanged contacts are detected without comparing every column.
+
+    Args:
+        local_values (Mapping[str, Any]): Local column values, including sync_hash
+        remote_contact (nimbus.NimbusContact): Matching Nimbus record
+
+    Returns:
+        Optional[Dict[str, Any]]: Merged values, or None if nothing changes
+    """
+
+    values = dict(local_values)
+    values.update(remote_contact_values(remote_contact))
+
+    if models.sync_hash(values) == local_values["sync_hash"]:
+        return None
+
+    return values
+
+
+def unique_contact_updates(
+    local_contacts: Sequence[Any], updates: List[Dict[str, Any]]
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Leave out the updates that would give two contacts the same nimbus_id or email
+
+    Nimbus records may share an email, and one record may hold the emails of
+    two local contacts, so a chunk can ask for values the unique indexes
+    reject. Every contact of the chunk keeps its current nimbus_id and email,
+    and the first update asking for a free value takes it.
+
+    Args:
+        local_contacts (Sequence[Any]): Rows with id, nimbus_id and email
+        updates (List[Dict[str, Any]]): New values of some of these contacts
+
+    Returns:
+        Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]: Updates that can be
+            written, and the ones clashing with another contact of the chunk
+    """
+
+    def unique_keys(nimbus_id: Optional[str], email: Optional[str]) -> List[Any]:
+        keys: List[Any] = []
+        if nimbus_id:
+            keys.append(("nimbus_id", nimbus_id))
+        if email:
+            keys.append(("email", email.lower()))
+        return keys
+
+    owners: Dict[Any, int] = {}
+    for contact in local_contacts:
+        for key in unique_keys(contact.nimbus_id, contact.email):
+            owners.setdefault(key, contact.id)
+
+    unique, conflicting = [], []
+    for values in updates:
+        keys = unique_keys(values["nimbus_id"], values["email"])
+        if any(owners.get(key, values["id"]) != values["id"] for key in keys):
+            conflicting.append(values)
+            continue
+
+        owners.update((key, values["id"]) for key in keys)
+        unique.append(values)
+
+    return unique, conflicting
+
+
+def write_contact_updates(
+    db_session: Session,
+    local_contacts: Sequence[Any],
+    updates: List[Dict[str, Any]],
+) -> Tuple[int, int]:
+    """Bulk update contacts without breaking the unique indexes, without committing
+
+    Updates clashing within the chunk are left out before the UPDATE, and the
+    ones clashing with a contact outside of it are skipped by
+    crud.bulk_update_contacts. Either way the contact keeps its stored values
+    and the clash is logged, so the rest of the chunk is still written.
+
+    Args:
+        db_session (Session): Database session
+        local_contacts (Sequence[Any]): Rows with id, nimbus_id and email
+        updates (List[Dict[str, Any]]): New values of some of these contacts
+
+    Returns:
+        Tuple[int, int]: Number of contacts updated, and of updates left out
+    """
+
+    unique, conflicting = unique_contact_updates(local_contacts, updates)
+    conflicting += crud.bulk_update_contacts(db_session, unique)
+
+    for values in conflicting:
+        logger.warning(
+            f"[!] Contact {values['id']} not updated, its nimbus_id "
+            f"{values['nimbus_id']} or email {values['email']} belongs to another contact"
+        )
+
+    return len(updates) - len(conflicting), len(conflicting)
+
+
+def apply_remote_contacts(
+    db_session: Session, matches: Sequence[Tuple[Any, nimbus.NimbusContact]]
+) -> Dict[str, int]:
+    """Write Nimbus records onto the local contacts they change, without committing
+
+    Args:
+        db_session (Session): Database session
+        matches (Sequence[Tuple[Any, nimbus.NimbusContact]]): Rows with the
+            columns of crud.SYNC_COLUMNS and their Nimbus record
+
+    Returns:
+        Dict[str, int]: Number of contacts changed, unchanged and left out
+            because the new values belong to another contact
+    """
+
+    updates = []
+    for local_contact, remote_contact in matches:
+        values = changed_values(local_contact._mapping, remote_contact)
+        if values is not None:
+            updates.append(values)
+
+    changed, conflicting = write_contact_updates(
+        db_session, [local_contact for local_contact, _ in matches], updates
+    )
+
+    return {
+        "changed": changed,
+        "unchanged": len(matches) - len(updates),
+        "conflicting": conflicting,
+    }
+
 
 @celery.task(bind=True)
-def task_full_text_search(self: Task, text: str) -> Optional[List[models.Contact]]:
+def task_full_text_search(
+    self: Task,
+    text: str,
+    limit: int = search.DEFAULT_LIMIT,
+    cursor: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
     """Task method to execute full text search query
 
     Args:
         self (Task): Celery task object
         text (str): Search text
+        limit (int): Page size. Defaults to search.DEFAULT_LIMIT.
+        cursor (Optional[str]): Cursor of the previous page. Defaults to None.
 
     Returns:
-        Optional[List[models.Contact]]: List of contacts found
+        Optional[Dict[str, Any]]: Page of contacts found with the next cursor
     """
 
-    with SessionLocal() as db_session:
-        results = search.full_text_search(session=db_session, text=text)
+    with ReadSessionLocal() as db_session:
+        page = search.full_text_search(
+            session=db_session, text=text, limit=limit, cursor=cursor
+        )
 
-    if not results:
+    if not page["results"]:
         return None
 
-    return [dict(row) for row in results]  # type: ignore
+    return page
+
+
+@celery.task(bind=True, acks_late=True)
+def task_enrich_contacts(
+    self: Task, chunk_size: int = ENRICHMENT_CHUNK_SIZE
+) -> Dict[str, Any]:
+    """Resumable background job that links local contacts to Nimbus records
+
+    Contacts are walked in id order, one chunk at a time. The nimbus_id updates
+    of a chunk and the checkpoint (last processed id) are committed together, so
+    after a crash the job continues from the last committed chunk. Progress is
+    stored in the JobState table and reported as the PROGRESS task state.
+
+    Args:
+        self (Task): Celery task object
+        chunk_size (int): Contacts per chunk. Defaults to ENRICHMENT_CHUNK_SIZE.
+
+    Returns:
+        Dict[str, Any]: Final job state
+    """
+
+    lock = get_redis().lock(
+        f"{ENRICHMENT_JOB}:lock", timeout=ENRICHMENT_LOCK_TIMEOUT_SECONDS
+    )
+    if not lock.acquire(blocking=False):
+        logger.info("[!] Contact enrichment is already running, skipping.")
+        return {"status": "skipped"}
+
+    try:
+        with SessionLocal() as db_session:
+            state = dict(crud.get_job_state(db_session, ENRICHMENT_JOB).state)
+
+            if state.get("status") == "completed":
+                logger.info("[+] Contact enrichment already completed.")
+                return state
+
+            state.setdefault("last_id", 0)
+            state.setdefault("processed", 0)
+            state.setdefault("matched", 0)
+            state["total"] = db_session.query(models.Contact).count()
+            state["status"] = "running"
+
+            logger.info(f"[+] Enriching contacts from id {state['last_id']}...")
+
+            with nimbus_event_loop() as (loop, nimbus_client):
+                for contacts in crud.iter_contact_chunks(
+                    db_session, chunk_size, after_id=state["last_id"]
+                ):
+                    pending = [c for c in contacts if c.email and not c.nimbus_id]
+                    nimbus_ids, failed = loop.run_until_complete(
+                        load.enrich_contacts(pending, nimbus_client)
+                    )
+                    deferred = defer_contacts(c.id for c in failed)
+
+                    updates = [
+                        {**c._mapping, "nimbus_id": nimbus_ids[c.id]}
+                        for c in pending
+                        if c.id in nimbus_ids
+                    ]
+                    matched, conflicting = write_contact_updates(
+                        db_session, contacts, updates
+                    )
+                    state["last_id"] = contacts[-1].id
+                    state["processed"] += len(contacts)
+                    state["matched"] += matched
+
+                    crud.save_job_state(db_session, ENRICHMENT_JOB, state)
+                    db_session.commit()
+                    lock.reacquire()
+
+                    # Core updates do not go through the ORM after_commit hook
+                    if matched:
+                        search_cache.invalidate()
+
+                    metrics.ENRICHMENT_CONTACTS.labels("processed").inc(len(contacts))
+                    metrics.ENRICHMENT_CONTACTS.labels("matched").inc(matched)
+                    metrics.ENRICHMENT_CONTACTS.labels("conflicting").inc(conflicting)
+                    metrics.ENRICHMENT_CONTACTS.labels("deferred").inc(deferred)
+
+                    self.update_state(state="PROGRESS", meta=state)
+                    logger.info(
+                        f"[+] Enriched {state['processed']}/{state['total']} contacts"
+                    )
+
+            state["status"] = "completed"
+            crud.save_job_state(db_session, ENRICHMENT_JOB, state)
+            db_session.commit()
+    finally:
+        lock.release()
+
+    logger.info(f"[+] Contact enrichment completed: {state}")
+
+    return state
+
+
+def reconcile_contacts(
+    loop: asyncio.AbstractEventLoop,
+    client: nimbus.AsyncNimbusAPIClient,
+    db_session: Session,
+    chunk: Sequence[Any],
+) -> Dict[str, int]:
+    """Look up a chunk of contact rows in Nimbus, apply and commit the results
+
+    Only the contacts the Nimbus records actually change are written, with one
+    bulk UPDATE. A contact whose new nimbus_id or email belongs to another
+    contact keeps its values. Contacts whose lookup failed, including the ones
+    rejected while the circuit breaker is open, are put on the retry queue.
+
+    Args:
+        loop (asyncio.AbstractEventLoop): Event loop the client is bound to
+        client (nimbus.AsyncNimbusAPIClient): Shared Nimbus API client
+        db_session (Session): Database session
+        chunk (Sequence[Any]): Rows with the columns of crud.SYNC_COLUMNS
+
+    Returns:
+        Dict[str, int]: Number of contacts scanned, changed, unchanged,
+            conflicting, skipped and deferred
+    """
+
+    stats = {
+        "scanned": len(chunk),
+        "changed": 0,
+        "unchanged": 0,
+        "conflicting": 0,
+        "skipped": 0,
+        "deferred": 0,
+    }
+
+    for local_contact in chunk:
+        if not local_contact.nimbus_id and not local_contact.email:
+            stats["skipped"] += 1
+            logger.info(
+                f"[+] Local contact {local_contact.id} does not contain either nimbus_id nor email"
+            )
+
+    remote_contacts, failed = loop.run_until_complete(
+        fetch_remote_contacts(client, chunk)
+    )
+
+    matches = [
+        (local_contact, remote_contacts[local_contact.id])
+        for local_contact in chunk
+        if local_contact.id in remote_contacts
+    ]
+    stats.update(apply_remote_contacts(db_session, matches))
+    db_session.commit()
+
+    stats["deferred"] = defer_contacts(failed)
+
+    return stats
+
+
+def reconcile_all_contacts(
+    loop: asyncio.AbstractEventLoop,
+    client: nimbus.AsyncNimbusAPIClient,
+    db_session: Session,
+    chunk_size: int = SYNC_CHUNK_SIZE,
+    after_id: int = 0,
+    until_id: Optional[int] = None,
+) -> Dict[str, int]:
+    """Full reconcile: look up local contacts in Nimbus and apply the results
+
+    Contacts are streamed as plain rows in id-ordered chunks, so neither the
+    identity map nor the set of in-flight lookups grows with the table. The
+    Nimbus requests of a chunk are bounded by the client's concurrency limit,
+    and each chunk is committed on its own.
+
+    Args:
+        loop (asyncio.AbstractEventLoop): Event loop the client is bound to
+        client (nimbus.AsyncNimbusAPIClient): Shared Nimbus API client
+        db_session (Session): Database session
+        chunk_size (int): Contacts per chunk. Defaults to SYNC_CHUNK_SIZE.
+        after_id (int): Only contacts with a greater id. Defaults to 0.
+        until_id (Optional[int]): Only contacts up to this id. Defaults to None.
+
+    Returns:
+        Dict[str, int]: Number of contacts scanned, changed, unchanged,
+            conflicting, skipped and deferred
+    """
+
+    stats = {
+        "scanned": 0,
+        "changed": 0,
+        "unchanged": 0,
+        "conflicting": 0,
+        "skipped": 0,
+        "deferred": 0,
+    }
+
+    for chunk in crud.iter_contact_chunks(db_session, chunk_size, after_id, until_id):
+        for key, count in reconcile_contacts(loop, client, db_session, chunk).items():
+            stats[key] += count
+
+        logger.info(f"[+] Reconciled {stats['scanned']} contacts")
+
+    return stats
+
+
+def sync_changed_contacts(
+    loop: asyncio.AbstractEventLoop,
+    client: nimbus.AsyncNimbusAPIClient,
+    db_session: Session,
+    since: datetime,
+) -> Optional[Dict[str, int]]:
+    """Incremental sync: apply only the Nimbus records modified since a watermark
+
+    Changed records are paged through with list_contacts and matched to local
+    contacts by nimbus_id, then by email. Each page is committed on its own;
+    replaying a page is harmless, so a failed run is simply retried from the
+    same watermark.
+
+    Args:
+        loop (asyncio.AbstractEventLoop): Event loop the client is bound to
+        client (nimbus.AsyncNimbusAPIClient): Shared Nimbus API client
+        db_session (Session): Database session
+        since (datetime): Watermark of the last successful sync
+
+    Returns:
+        Optional[Dict[str, int]]: Number of changed records scanned, and of
+            matching local contacts changed, unchanged and conflicting, or None
+            if Nimbus could not be read
+    """
+
+    query = client.updated_since_query(since - SYNC_WATERMARK_OVERLAP)
+    stats = {"scanned": 0, "changed": 0, "unchanged": 0, "conflicting": 0}
+    page = 1
+
+    while True:
+        response = loop.run_until_complete(client.list_contacts(page=page, query=query))
+        if response is None:
+            return None
+
+        remote_by_id = {contact.id: contact for contact in response.resources}
+        local_contacts = crud.list_contacts_by_nimbus_ids(
+            db_session, list(remote_by_id)
+        )
+        matches = [
+            (local_contact, remote_by_id[local_contact.nimbus_id])
+            for local_contact in local_contacts
+        ]
+
+        linked_ids = {local_contact.nimbus_id for local_contact in local_contacts}
+        remote_by_email: Dict[str, nimbus.NimbusContact] = {}
+        for remote_contact in remote_by_id.values():
+            if remote_contact.id in linked_ids:
+                continue
+            for email in nimbus.field_values(remote_contact, "email"):
+                remote_by_email.setdefault(email.lower(), remote_contact)
+
+        unlinked_contacts = crud.list_contacts_by_emails(
+            db_session, list(remote_by_email)
+        )
+        matches += [
+            (local_contact, remote_by_email[local_contact.email.lower()])
+            for local_contact in unlinked_contacts
+        ]
+
+        page_stats = apply_remote_contacts(db_session, matches)
+        db_session.commit()
+
+        stats["scanned"] += len(response.resources)
+        for key, count in page_stats.items():
+            stats[key] += count
+
+        if not client.has_next_page(response, page):
+            return stats
+
+        page += 1
+
+
+def shard_ranges(
+    first_id: Optional[int],
+    last_id: Optional[int],
+    shards: int = SYNC_SHARDS,
+    min_size: int = SYNC_CHUNK_SIZE,
+) -> List[Tuple[int, int]]:
+    """Split a contact id range into contiguous shards
+
+    Shards cover equal id spans of at least min_size ids, so a small table is
+    not split into shards of a few contacts each.
+
+    Args:
+        first_id (Optional[int]): Lowest contact id, None for an empty table
+        last_id (Optional[int]): Highest contact id, None for an empty table
+        shards (int): Maximum number of shards. Defaults to SYNC_SHARDS.
+        min_size (int): Minimum ids per shard. Defaults to SYNC_CHUNK_SIZE.
+
+    Returns:
+        List[Tuple[int, int]]: (after_id, until_id) bounds of every shard
+    """
+
+    if first_id is None or last_id is None:
+        return []
+
+    size = max(min_size, math.ceil((last_id - first_id + 1) / shards))
+
+    return [
+        (start - 1, min(start + size - 1, last_id))
+        for start in range(first_id, last_id + 1, size)
+    ]
+
+
+def sync_lock(token: Optional[str] = None) -> Lock:
+    """Return the Redis lock preventing overlapping sync runs
+
+    The lock is acquired by task_update_contacts and released by whichever task
+    ends the run, so its token is passed along instead of being thread local.
+
+    Args:
+        token (Optional[str]): Token of an acquired lock. Defaults to None.
+
+    Returns:
+        Lock: Sync lock
+    """
+
+    lock = get_redis().lock(
+        SYNC_LOCK_KEY, timeout=SYNC_LOCK_TIMEOUT_SECONDS, thread_local=False
+    )
+    if token:
+        lock.local.token = token.encode()
+
+    return lock
+
+
+def release_sync_lock(token: str) -> None:
+    """Release the sync lock held under the given token
+
+    Args:
+        token (str): Token of the acquired lock
+    """
+
+    try:
+        sync_lock(token).release()
+    except LockError:
+        logger.warning("[!] Contacts sync lock had already expired")
+
+
+def count_sync_contacts(mode: str, stats: Dict[str, int]) -> None:
+    for outcome, count in stats.items():
+        metrics.SYNC_CONTACTS.labels(mode, outcome).inc(count)
+
+
+def complete_sync(
+    db_session: Session,
+    mode: str,
+    started_at: datetime,
+    stats: Optional[Dict[str, int]],
+) -> Dict[str, Any]:
+    """Record the end of a sync run and move the watermark if it succeeded
+
+    Args:
+        db_session (Session): Database session
+        mode (str): "full" or "incremental"
+        started_at (datetime): Start of the run, the next watermark
+        stats (Optional[Dict[str, int]]): Run statistics, None if the run failed
+
+    Returns:
+        Dict[str, Any]: Sync mode, status and statistics
+    """
+
+    # A failed run may have committed some changes before failing
+    if stats is None or stats["changed"]:
+        search_cache.invalidate()
+
+    state = dict(crud.get_job_state(db_session, SYNC_JOB).state)
+
+    if stats is None:
+        logger.warning(
+            f"[!] Contacts sync ({mode}) failed, keeping watermark "
+            f"{state.get('watermark')}"
+        )
+        metrics.SYNC_RUNS.labels(mode, "failed").inc()
+        return {"mode": mode, "status": "failed"}
+
+    state["watermark"] = started_at.isoformat()
+    if mode == "full":
+        state["last_full_sync"] = started_at.isoformat()
+
+    crud.save_job_state(db_session, SYNC_JOB, state)
+    db_session.commit()
+
+    metrics.SYNC_RUNS.labels(mode, "completed").inc()
+    logger.info(f"[+] Contacts sync ({mode}) completed: {stats}")
+
+    return {"mode": mode, "status": "completed", **stats}
 
 
 @celery.task
-def task_update_contacts() -> None:
-    """Recurring background task to update contacts from external API"""
+def task_update_contacts(full: bool = False) -> Dict[str, Any]:
+    """Recurring background task to update contacts from external API
+
+    By default only the records modified in Nimbus since the last successful
+    sync are fetched, within this task. A full reconcile of every local contact
+    runs when requested, or when no watermark has been recorded yet. It is
+    split into id range shards, run by task_sync_shard on any sync worker, and
+    completed by task_finish_sync once every shard is done.
+
+    A Redis lock is held for the whole run, so a run started while the previous
+    one is still going is skipped.
+
+    Args:
+        full (bool): Force a full reconcile. Defaults to False.
+
+    Returns:
+        Dict[str, Any]: Sync mode and statistics, or for a full reconcile the
+            number of shards and the id of the task_finish_sync result
+    """
 
     logger.info("[+] Executing task_update_contacts...")
 
-    with requests.Session() as session:
-        nimbus_client = nimbus.NimbusAPIClient(session)
+    # The token is passed on to the task ending the run, which releases the lock
+    token = uuid.uuid4().hex
+    lock = sync_lock()
+    if not lock.acquire(blocking=False, token=token):
+        logger.info("[!] Contacts sync is already running, skipping.")
+        return {"status": "skipped"}
+
+    started_at = datetime.now(timezone.utc)
+    dispatched = False
 
+    try:
         with SessionLocal() as db_session:
-            local_contacts: List[models.Contact] = crud.list_contacts(db_session)
-
-            future_contacts = {}
-            with futures.ThreadPoolExecutor(max_workers=10) as executor:
-                for local_contact in local_contacts:
-                    if local_contact.nimbus_id:
-                        future_contacts[
-                            executor.submit(
-                                nimbus_client.get_contact, local_contact.nimbus_id
-                            )
-                        ] = local_contact
-                    elif local_contact.email:
-                        query = {"email": {"is": local_contact.email}}
-                        future_contacts[
-                            executor.submit(nimbus_client.list_contacts, query=query)
-                        ] = local_contact
-                    else:
-                        logger.info(
-                            f"[+] Local contact {local_contact} does not contain either nimbus_id nor email"
-                        )
-
-                for future_contact in futures.as_completed(future_contacts):
-                    local_contact = future_contacts[future_contact]
-                    data: Optional[
-                        nimbus.NimbusContactsResponse
-                    ] = future_contact.result()
-
-                    if data and len(data.resources) > 0:
-                        remote_contact = data.resources[0]
-                        local_contact.nimbus_id = remote_contact.id
-
-                        if (
-                            "first name" in remote_contact.fields
-                            and len(remote_contact.fields["first name"]) > 0
-                        ):
-                            local_contact.first_name = remote_contact.fields[
-                                "first name"
-                            ][0]
-                        if (
-                            "last name" in remote_contact.fields
-                            and len(remote_contact.fields["last name"]) > 0
-                        ):
-                            local_contact.last_name = remote_contact.fields[
-                                "last name"
-                            ][0]
-                        if (
-                            "email" in remote_contact.fields
-                            and len(remote_contact.fields["email"]) > 0
-                        ):
-                            local_contact.email = remote_contact.fields["email"][0]
-
-
-# Schedule the task to run every minute
+            watermark = crud.get_job_state(db_session, SYNC_JOB).state.get("watermark")
+
+            if full or watermark is None:
+                shards = shard_ranges(*crud.get_contact_id_range(db_session))
+                result = chord([task_sync_shard.si(*shard) for shard in shards])(
+                    task_finish_sync.s(started_at.isoformat(), token)
+                )
+                dispatched = True
+
+                logger.info(f"[+] Dispatched {len(shards)} contacts sync shards")
+                return {
+                    "mode": "full",
+                    "status": "dispatched",
+                    "shards": len(shards),
+                    "result_id": result.id,
+                }
+
+            with nimbus_event_loop() as (loop, nimbus_client):
+                stats = sync_changed_contacts(
+                    loop,
+                    nimbus_client,
+                    db_session,
+                    since=datetime.fromisoformat(watermark),
+                )
+
+            if stats is not None:
+                count_sync_contacts("incremental", stats)
+
+            return complete_sync(db_session, "incremental", started_at, stats)
+    finally:
+        if not dispatched:
+            lock.release()
+
+
+@celery.task(acks_late=True)
+def task_sync_shard(after_id: int, until_id: int) -> Dict[str, Any]:
+    """Full reconcile of the contacts with after_id < id <= until_id
+
+    Failures are returned rather than raised, so the chord still reaches
+    task_finish_sync, which releases the sync lock.
+
+    Args:
+        after_id (int): Lower bound of the shard, exclusive
+        until_id (int): Upper bound of the shard, inclusive
+
+    Returns:
+        Dict[str, Any]: Shard status and statistics
+    """
+
+    try:
+        with nimbus_event_loop() as (loop, nimbus_client):
+            with SessionLocal() as db_session:
+                stats = reconcile_all_contacts(
+                    loop,
+                    nimbus_client,
+                    db_session,
+                    after_id=after_id,
+                    until_id=until_id,
+                )
+    except Exception:
+        logger.exception(f"[-] Contacts sync shard ({after_id}, {until_id}] failed")
+        return {"status": "failed", "after_id": after_id, "until_id": until_id}
+
+    count_sync_contacts("full", stats)
+    logger.info(f"[+] Contacts sync shard ({after_id}, {until_id}] completed")
+
+    return {"status": "completed", **stats}
+
+
+@celery.task
+def task_finish_sync(
+    results: List[Dict[str, Any]], started_at: str, lock_token: str
+) -> Dict[str, Any]:
+    """Aggregate the shard statistics of a full reconcile and end the run
+
+    The watermark only moves if every shard completed. The sync lock is
+    released in any case.
+
+    Args:
+        results (List[Dict[str, Any]]): Results of the shard tasks
+        started_at (str): Start of the run in ISO format
+        lock_token (str): Token of the sync lock held by the run
+
+    Returns:
+        Dict[str, Any]: Sync mode, status and aggregated statistics
+    """
+
+    try:
+        stats: Dict[str, int] = {}
+        completed = [r for r in results if r["status"] == "completed"]
+        for result in completed:
+            for key, count in result.items():
+                if key != "status":
+                    stats[key] = stats.get(key, 0) + count
+
+        failed = len(results) - len(completed)
+        with SessionLocal() as db_session:
+            outcome = complete_sync(
+                db_session,
+                "full",
+                datetime.fromisoformat(started_at),
+                None if failed else stats,
+            )
+    finally:
+        release_sync_lock(lock_token)
+
+    return {**stats, **outcome, "shards": len(results), "failed_shards": failed}
+
+
+@celery.task
+def task_retry_contacts(batch_size: int = RETRY_BATCH_SIZE) -> Dict[str, Any]:
+    """Recurring background task retrying the deferred Nimbus lookups
+
+    Contacts are taken off the retry queue one batch at a time and reconciled
+    like in a full sync. Contacts failing again are put back, and the run stops
+    there, since Nimbus is still unavailable.
+
+    Args:
+        batch_size (int): Contacts per batch. Defaults to RETRY_BATCH_SIZE.
+
+    Returns:
+        Dict[str, Any]: Number of contacts retried, changed and deferred again
+    """
+
+    redis_client = get_redis()
+    stats = {
+        "scanned": 0,
+        "changed": 0,
+        "unchanged": 0,
+        "conflicting": 0,
+        "skipped": 0,
+        "deferred": 0,
+    }
+
+    with nimbus_event_loop() as (loop, nimbus_client):
+        with SessionLocal() as db_session:
+            while True:
+                ids = [int(i) for i in redis_client.spop(RETRY_QUEUE_KEY, batch_size)]
+                if not ids:
+                    break
+
+                chunk = crud.list_contact_rows(db_session, ids)
+                chunk_stats = reconcile_contacts(loop, nimbus_client, db_session, chunk)
+                for key, count in chunk_stats.items():
+                    stats[key] += count
+
+                if chunk_stats["deferred"]:
+                    break
+
+    if stats["changed"]:
+        search_cache.invalidate()
+
+    for outcome, count in stats.items():
+        metrics.SYNC_CONTACTS.labels("retry", outcome).inc(count)
+
+    logger.info(f"[+] Contacts retry completed: {stats}")
+
+    return stats
+
+
+# Incremental sync every night, full reconcile once a week as a fallback.
+# Deferred lookups are retried every 15 minutes.
 celery.conf.beat_schedule = {
     "update-contacts": {
-        "task": "tasks.task_update_contacts",
-        "schedule": crontab(hour="0"),
+        "task": "api.tasks.task_update_contacts",
+        "schedule": crontab(minute="0", hour="0"),
+    },
+    "reconcile-contacts": {
+        "task": "api.tasks.task_update_contacts",
+        "schedule": crontab(minute="0", hour="3", day_of_week="sunday"),
+        "kwargs": {"full": True},
+    },
+    "retry-contacts": {
+        "task": "api.tasks.task_retry_contacts",
+        "schedule": crontab(minute="*/15"),
     },
 }
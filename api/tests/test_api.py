@@ -1,5 +1,7 @@
 from fastapi.testclient import TestClient
 
+from api.utils import models, search
+
 
 def test_search_v1(client: TestClient, test_data):
     """Test GET /api/v1/search endpoint
@@ -11,7 +13,7 @@ def test_search_v1(client: TestClient, test_data):
 
     response = client.get("/api/v1/search?text=john")
     assert response.status_code == 200
-    assert response.json()[0]["first_name"] == "John"
+    assert response.json()["results"][0]["first_name"] == "John"
 
 
 def test_search_v2(client: TestClient, test_data):
@@ -28,3 +30,44 @@ def test_search_v2(client: TestClient, test_data):
 
     task_id = response.json().get("task_id")
     assert task_id is not None
+
+
+def test_suggest_v1(client: TestClient, test_data):
+    """Test GET /api/v1/suggest endpoint with a partial name
+
+    Args:
+        client (TestClient): HTTP client
+        test_data: Fixture to load test data
+    """
+
+    response = client.get("/api/v1/suggest?q=Wic")
+    assert response.status_code == 200
+    assert response.json()[0]["last_name"] == "Wick"
+
+    response = client.get("/api/v1/suggest?q=Wi")
+    assert response.status_code == 422
+
+
+def test_search_pages_through_equal_ranks(db_session):
+    """Test that keyset pages neither skip nor repeat rows with the same rank
+
+    Args:
+        db_session (SessionTesting): Database session
+    """
+
+    contacts = [
+        models.Contact(first_name="Tied", last_name="Rank", email=f"tied{i}@x.com")
+        for i in range(3)
+    ]
+    db_session.add_all(contacts)
+    db_session.flush()
+
+    seen, cursor = [], None
+    while True:
+        page = search.full_text_search(db_session, "tied rank", limit=1, cursor=cursor)
+        seen.extend(row["id"] for row in page["results"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == sorted(contact.id for contact in contacts)
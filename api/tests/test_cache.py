@@ -0,0 +1,87 @@
+import time
+
+import pytest
+
+from api.utils.cache import LRUCache, SearchCache
+
+
+@pytest.fixture
+def cache():
+    return SearchCache(maxsize=2, local_ttl=60, redis_url=None)
+
+
+def test_lru_cache_evicts_least_recently_used():
+    """Test that the oldest untouched entry is evicted when the cache is full"""
+
+    lru = LRUCache(maxsize=2, ttl=60)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    lru.get("a")
+    lru.set("c", 3)
+
+    assert lru.get("a") == 1
+    assert lru.get("b") is None
+    assert lru.get("c") == 3
+
+
+def test_lru_cache_expires_entries():
+    """Test that entries are dropped once their TTL has passed"""
+
+    lru = LRUCache(maxsize=2, ttl=0.01)
+    lru.set("a", 1)
+    time.sleep(0.02)
+
+    assert lru.get("a") is None
+    assert len(lru) == 0
+
+
+def test_search_cache_key_normalizes_query(cache):
+    """Test that case and whitespace differences share one cache key
+
+    Args:
+        cache (SearchCache): SearchCache instance
+    """
+
+    assert cache.key("John  Wick", 20, None) == cache.key(" john wick ", 20, None)
+    assert cache.key("john", 20, None) != cache.key("john", 10, None)
+
+
+def test_search_cache_read_through_and_invalidate(cache):
+    """Test that the loader runs once per key until the cache is invalidated
+
+    Args:
+        cache (SearchCache): SearchCache instance
+    """
+
+    calls = []
+
+    def load():
+        calls.append(1)
+        return {"results": [], "next_cursor": None}
+
+    key = cache.key("john", 20, None)
+    cache.get_or_load(key, load)
+    cache.get_or_load(key, load)
+    assert len(calls) == 1
+
+    cache.invalidate()
+    cache.get_or_load(key, load)
+    assert len(calls) == 2
+
+
+def test_search_cache_skips_store_after_concurrent_invalidation(cache):
+    """Test that a page loaded across an invalidation is not cached locally
+
+    Args:
+        cache (SearchCache): SearchCache instance
+    """
+
+    key = cache.key("john", 20, None)
+
+    def load():
+        cache.invalidate()
+        return {"results": [], "next_cursor": None}
+
+    cache.get_or_load(key, load)
+
+    assert cache.local.get(key) is None
@@ -0,0 +1,34 @@
+from unittest.mock import MagicMock
+
+from sqlalchemy.exc import IntegrityError
+
+from api.utils import crud
+
+
+def test_bulk_update_skips_contacts_breaking_a_unique_index():
+    """Test that a clash fails the batch SAVEPOINT only, and that the other
+    contacts are then written one by one"""
+
+    def execute(statement, params):
+        if isinstance(params, list) or params["contact_id"] == 2:
+            raise IntegrityError("UPDATE", params, Exception("duplicate key"))
+
+    db = MagicMock()
+    db.execute.side_effect = execute
+    contacts = [
+        {
+            "id": i,
+            "nimbus_id": f"n{i}",
+            "first_name": "A",
+            "last_name": "B",
+            "email": f"{i}@x",
+        }
+        for i in (1, 2, 3)
+    ]
+
+    conflicting = crud.bulk_update_contacts(db, contacts)
+
+    assert conflicting == [contacts[1]]
+    assert db.begin_nested.call_count == 4
+    retried = [call.args[1]["contact_id"] for call in db.execute.call_args_list[1:]]
+    assert retried == [1, 2, 3]
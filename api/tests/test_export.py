@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from api.utils import export
+
+
+class FakeRow(dict):
+    """Stand-in for the records yielded by databases.Database.iterate"""
+
+
+class FakeDatabase:
+    """Database double that streams a fixed list of rows"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def iterate(self, query):
+        for row in self.rows:
+            yield row
+
+
+async def collect(chunks):
+    return [chunk async for chunk in chunks]
+
+
+@pytest.mark.asyncio
+async def test_ndjson_export_is_chunked(mocker):
+    """Test that NDJSON is emitted one batch per chunk, one contact per line
+
+    Args:
+        mocker (MockerFixture): pytest-mock fixture
+    """
+
+    mocker.patch.object(export, "EXPORT_BATCH_SIZE", 2)
+    rows = [FakeRow(id=i, email=f"{i}@x") for i in range(1, 4)]
+
+    chunks = await collect(export.iter_ndjson(FakeDatabase(rows)))
+
+    assert len(chunks) == 2
+    lines = b"".join(chunks).decode().splitlines()
+    assert [json.loads(line) for line in lines] == rows
+
+
+@pytest.mark.asyncio
+async def test_csv_export_uses_import_header():
+    """Test that the CSV export starts with the same header as contacts.csv"""
+
+    rows = [
+        FakeRow(
+            first_name="Ada", last_name="Lovelace", email="ada@x", description="a, b"
+        )
+    ]
+
+    chunks = await collect(export.iter_csv(FakeDatabase(rows)))
+
+    assert b"".join(chunks).decode() == (
+        "first_name,last_name,email,description\n" 'Ada,Lovelace,ada@x,"a, b"\n'
+    )
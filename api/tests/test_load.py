@@ -0,0 +1,41 @@
+from unittest.mock import Mock
+
+from api import load
+
+
+def test_iter_csv_chunks(tmp_path):
+    """Test that the CSV file is streamed in chunks of the requested size
+
+    Args:
+        tmp_path (Path): Temporary directory
+    """
+
+    filename = tmp_path / "contacts.csv"
+    rows = "\n".join(f"First{i},Last{i},user{i}@example.com,Desc {i}" for i in range(5))
+    filename.write_text(f"first_name,last_name,email,description\n{rows}\n")
+
+    chunks = list(load.iter_csv_chunks(str(filename), chunk_size=2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert chunks[2][0]["email"] == "user4@example.com"
+
+
+def test_copy_contacts_writes_csv_with_nulls():
+    """Test that a chunk is sent through COPY with empty values as NULL"""
+
+    cursor = Mock()
+    rows = [
+        {"first_name": "John", "last_name": "Wick", "email": "", "description": "a, b"}
+    ]
+
+    cursor.rowcount = 1
+
+    inserted = load.copy_contacts(cursor, rows)
+
+    sql, buffer = cursor.copy_expert.call_args.args
+    assert sql.startswith(
+        "COPY contact_import (first_name, last_name, email, description)"
+    )
+    assert buffer.getvalue() == 'John,Wick,,"a, b"\r\n'
+    cursor.execute.assert_called_once_with(load.INSERT_STAGED_SQL)
+    assert inserted == 1
@@ -0,0 +1,55 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+
+from api.utils import metrics
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_requests_are_recorded_by_route_template():
+    """Test that requests are counted per route template and exposed on /metrics"""
+
+    app = FastAPI()
+    metrics.instrument_app(app)
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: int):
+        return {"id": item_id}
+
+    labels = {"method": "GET", "route": "/items/{item_id}", "status": "200"}
+    before = sample("contact_book_http_requests_total", **labels)
+
+    with TestClient(app) as client:
+        client.get("/items/1")
+        client.get("/items/2")
+        response = client.get("/metrics")
+
+    assert sample("contact_book_http_requests_total", **labels) == before + 2
+    assert response.status_code == 200
+    assert 'route="/items/{item_id}"' in response.text
+
+
+def test_engine_queries_and_checkouts_are_timed():
+    """Test that statements and pool checkouts of an instrumented engine are observed"""
+
+    engine = create_engine("sqlite://")
+    metrics.instrument_engine(engine)
+
+    queries = sample("contact_book_db_query_seconds_count")
+    checkouts = sample("contact_book_db_pool_checkout_seconds_count")
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        connection.execute(text("SELECT 2"))
+
+    # A disposed engine gets a new pool, which must still be timed
+    engine.dispose()
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 3"))
+
+    assert sample("contact_book_db_query_seconds_count") == queries + 3
+    assert sample("contact_book_db_pool_checkout_seconds_count") == checkouts + 2
@@ -0,0 +1,91 @@
+from typing import Generator, List
+
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import text
+
+from api.tests.conftest import test_engine
+from api.utils import migrations, models
+
+TABLE = models.Contact.__tablename__
+
+
+@pytest.fixture
+def legacy_table(app: FastAPI) -> Generator[None, None, None]:
+    """Fixture to turn the contact table into its pre-migration shape
+
+    search_vector is a plain column, sync_hash and the unique email index are
+    missing, and the same email is stored twice with a different case.
+
+    Args:
+        app (FastAPI): Instance of FastAPI
+
+    Yields:
+        Generator[None, None, None]: Yields None and recreates the table afterwards
+    """
+
+    with test_engine.begin() as connection:
+        connection.execute(text("DROP INDEX idx_contact_email_lower"))
+        connection.execute(
+            text(
+                f'ALTER TABLE "{TABLE}" DROP COLUMN search_vector, '
+                f"DROP COLUMN sync_hash, ADD COLUMN search_vector tsvector"
+            )
+        )
+        connection.execute(
+            text(
+                f'INSERT INTO "{TABLE}" (first_name, last_name, email) VALUES '
+                f"('John', 'Wick', 'john.wick@example.com'), "
+                f"('Johnny', 'Wick', 'JOHN.WICK@example.com')"
+            )
+        )
+
+    yield
+
+    models.Contact.__table__.drop(test_engine)
+    models.Contact.__table__.create(test_engine)
+
+
+def stored_first_names() -> List[str]:
+    with test_engine.connect() as connection:
+        return list(
+            connection.execute(
+                text(f'SELECT first_name FROM "{TABLE}" ORDER BY id')
+            ).scalars()
+        )
+
+
+def test_run_migrations_converts_a_legacy_table(legacy_table):
+    """Test that the columns become generated, the duplicate emails are merged
+    into the oldest contact and the unique index is created
+
+    Args:
+        legacy_table: Fixture creating the legacy table
+    """
+
+    migrations.run_migrations(test_engine, deduplicate=True)
+
+    with test_engine.connect() as connection:
+        for column in ("search_vector", "sync_hash"):
+            assert migrations.column_generation(connection, TABLE, column) == "ALWAYS"
+        assert migrations.index_exists(connection, "idx_contact_email_lower")
+
+    assert stored_first_names() == ["John"]
+
+
+def test_run_migrations_keeps_duplicates_unless_asked(legacy_table):
+    """Test that a plain run deletes nothing and only skips the blocked index
+
+    Args:
+        legacy_table: Fixture creating the legacy table
+    """
+
+    migrations.run_migrations(test_engine)
+
+    with test_engine.connect() as connection:
+        assert migrations.column_generation(connection, TABLE, "search_vector") == (
+            "ALWAYS"
+        )
+        assert not migrations.index_exists(connection, "idx_contact_email_lower")
+
+    assert stored_first_names() == ["John", "Johnny"]
@@ -1,9 +1,18 @@
+import json
 from unittest.mock import Mock
 
+import httpx
 import pytest
 import requests
+from prometheus_client import REGISTRY
 
-from api.utils.nimbus import NimbusAPIClient, NimbusContactsResponse
+from api.utils.nimbus import (
+    AsyncNimbusAPIClient,
+    NimbusAPIClient,
+    NimbusContactsResponse,
+    NimbusResponseCache,
+)
+from api.utils.throttle import CircuitBreaker
 
 
 @pytest.fixture
@@ -107,3 +116,257 @@ def test_get_contact_http_error(client):
     response = client.get_contact(id=2)
 
     assert response is None
+
+
+def _async_client(handler, **kwargs):
+    transport = httpx.MockTransport(handler)
+    return AsyncNimbusAPIClient(client=httpx.AsyncClient(transport=transport), **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_async_list_contacts_success():
+    """Test successful request to list contacts with the async client"""
+
+    def handler(request):
+        assert request.headers["Authorization"].startswith("Bearer")
+        return httpx.Response(
+            200, json={"resources": [{"id": "1", "fields": {}}], "meta": {"total": 1}}
+        )
+
+    async with _async_client(handler) as client:
+        response = await client.list_contacts(query={"email": {"is": "a@b.c"}})
+
+    assert isinstance(response, NimbusContactsResponse)
+    assert response.resources[0].id == "1"
+
+
+@pytest.mark.asyncio
+async def test_async_client_honours_retry_after(mocker):
+    """Test that a 429 is retried after the delay sent in Retry-After
+
+    Args:
+        mocker (MockerFixture): pytest-mock fixture
+    """
+
+    sleep = mocker.patch("api.utils.nimbus.asyncio.sleep")
+    responses = [
+        httpx.Response(429, headers={"Retry-After": "7"}),
+        httpx.Response(
+            200, json={"resources": [{"id": "2", "fields": {}}], "meta": {}}
+        ),
+    ]
+
+    async with _async_client(lambda request: responses.pop(0)) as client:
+        response = await client.get_contact(id=2)
+
+    sleep.assert_awaited_once_with(7.0)
+    assert response.resources[0].id == "2"
+
+
+@pytest.mark.asyncio
+async def test_async_client_gives_up_after_retries(mocker):
+    """Test that persistent server errors end in None after max_retries
+
+    Args:
+        mocker (MockerFixture): pytest-mock fixture
+    """
+
+    mocker.patch("api.utils.nimbus.asyncio.sleep")
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    async with _async_client(handler, max_retries=2) as client:
+        response = await client.list_contacts()
+
+    assert response is None
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_async_resolve_emails_batches_and_paginates():
+    """Test that a batch of emails is one compound query followed across pages"""
+
+    pages = {
+        "1": {
+            "resources": [{"id": "1", "fields": {"email": [{"value": "A@x.com"}]}}],
+            "meta": {"page": 1, "pages": 2},
+        },
+        "2": {
+            "resources": [{"id": "2", "fields": {"email": ["b@x.com"]}}],
+            "meta": {"page": 2, "pages": 2},
+        },
+    }
+    queries = []
+
+    def handler(request):
+        queries.append(json.loads(request.url.params["query"]))
+        return httpx.Response(200, json=pages[request.url.params["page"]])
+
+    async with _async_client(handler) as client:
+        matches = await client.resolve_emails(["a@x.com", "b@x.com", "c@x.com"])
+
+    assert len(queries) == 2
+    assert queries[0] == {
+        "or": [
+            {"email": {"is": "a@x.com"}},
+            {"email": {"is": "b@x.com"}},
+            {"email": {"is": "c@x.com"}},
+        ]
+    }
+    assert {email: contact.id for email, contact in matches.items()} == {
+        "a@x.com": "1",
+        "b@x.com": "2",
+    }
+
+
+@pytest.mark.asyncio
+async def test_async_client_records_retries_and_latency(mocker):
+    """Test that retried calls and their total duration are recorded
+
+    Args:
+        mocker (MockerFixture): pytest-mock fixture
+    """
+
+    def sample(name, **labels):
+        return REGISTRY.get_sample_value(name, {"client": "async", **labels}) or 0.0
+
+    mocker.patch("api.utils.nimbus.asyncio.sleep")
+    responses = [
+        httpx.Response(503),
+        httpx.Response(200, json={"resources": [], "meta": {}}),
+    ]
+    retries = sample("contact_book_nimbus_retries_total", reason="503")
+    calls = sample("contact_book_nimbus_request_seconds_count", outcome="success")
+
+    async with _async_client(lambda request: responses.pop(0)) as client:
+        await client.list_contacts()
+
+    assert sample("contact_book_nimbus_retries_total", reason="503") == retries + 1
+    assert (
+        sample("contact_book_nimbus_request_seconds_count", outcome="success")
+        == calls + 1
+    )
+
+
+@pytest.mark.asyncio
+async def test_async_client_fails_fast_while_circuit_is_open(mocker):
+    """Test that an open breaker ends the retries and rejects later requests
+
+    Args:
+        mocker (MockerFixture): pytest-mock fixture
+    """
+
+    sleep = mocker.patch("api.utils.nimbus.asyncio.sleep")
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    async with _async_client(handler, max_retries=3, breaker=breaker) as client:
+        first = await client.list_contacts()
+        second = await client.get_contact(id=2)
+
+    assert first is None and second is None
+    assert len(calls) == 2
+    assert sleep.await_count == 1
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+class FakeAsyncRedis(dict):
+    """In-memory stand-in for the asyncio Redis commands used by the cache"""
+
+    async def get(self, key):
+        return self.get_value(key)
+
+    def get_value(self, key):
+        return dict.get(self, key)
+
+    async def set(self, key, value, ex=None):
+        self[key] = value
+
+    async def mget(self, keys):
+        return [self.get_value(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        redis = self
+
+        class Pipeline:
+            def __init__(self):
+                self.commands = []
+
+            def set(self, key, value, ex=None):
+                self.commands.append((key, value))
+
+            async def execute(self):
+                redis.update(self.commands)
+
+        return Pipeline()
+
+
+@pytest.fixture
+def nimbus_cache(mocker):
+    cache = NimbusResponseCache(redis_url="redis://cache", max_age=0)
+    mocker.patch.object(cache, "_get_aredis", return_value=FakeAsyncRedis())
+    return cache
+
+
+@pytest.mark.asyncio
+async def test_async_client_revalidates_cached_contact(nimbus_cache):
+    """Test that a stale cached record is revalidated and served on a 304
+
+    Args:
+        nimbus_cache (NimbusResponseCache): Cache on an in-memory Redis
+    """
+
+    requests_seen = []
+
+    def handler(request):
+        requests_seen.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        return httpx.Response(
+            200,
+            headers={"ETag": '"v1"'},
+            json={"resources": [{"id": "7", "fields": {}}], "meta": {}},
+        )
+
+    async with _async_client(handler, cache=nimbus_cache) as client:
+        first = await client.get_contact(id=7)
+        second = await client.get_contact(id=7)
+
+    assert first.resources[0].id == second.resources[0].id == "7"
+    assert "If-None-Match" not in requests_seen[0].headers
+    assert requests_seen[1].headers["If-None-Match"] == '"v1"'
+
+
+@pytest.mark.asyncio
+async def test_async_resolve_emails_skips_cached_misses(nimbus_cache):
+    """Test that emails without a match are not asked for again
+
+    Args:
+        nimbus_cache (NimbusResponseCache): Cache on an in-memory Redis
+    """
+
+    queries = []
+
+    def handler(request):
+        queries.append(json.loads(request.url.params["query"]))
+        return httpx.Response(
+            200,
+            json={
+                "resources": [{"id": "1", "fields": {"email": ["a@x.com"]}}],
+                "meta": {},
+            },
+        )
+
+    async with _async_client(handler, cache=nimbus_cache) as client:
+        await client.resolve_emails(["a@x.com", "B@x.com"])
+        matches = await client.resolve_emails(["c@x.com", "b@x.com"])
+
+    assert queries[1] == {"email": {"is": "c@x.com"}}
+    assert list(matches) == []
@@ -0,0 +1,162 @@
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from api.utils import models, search
+
+
+def test_cursor_round_trip():
+    """Test that an encoded cursor decodes back to the same keyset position"""
+
+    cursor = search.encode_cursor(0.0607927, 42)
+
+    assert search.decode_cursor(cursor) == (0.0607927, 42)
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "W10", "eyJhIjoxfQ"])
+def test_decode_invalid_cursor(cursor):
+    """Test that malformed cursors raise InvalidCursor
+
+    Args:
+        cursor (str): Malformed cursor
+    """
+
+    with pytest.raises(search.InvalidCursor):
+        search.decode_cursor(cursor)
+
+
+@pytest.mark.parametrize(
+    "rank, id",
+    [(0.5, -1), (0.5, 2**31), (1e39, 1), (float("inf"), 1), (float("nan"), 1)],
+)
+def test_decode_out_of_range_cursor(rank, id):
+    """Test that cursors the id and rank columns cannot hold raise InvalidCursor
+
+    Args:
+        rank (float): Encoded rank
+        id (int): Encoded id
+    """
+
+    with pytest.raises(search.InvalidCursor):
+        search.decode_cursor(search.encode_cursor(rank, id))
+
+
+def test_search_statement_uses_keyset():
+    """Test that a cursor turns into a keyset predicate rather than an OFFSET"""
+
+    statement = search.search_statement(after_cursor=True)
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+
+    assert "ts_rank_cd" in sql
+    assert "OFFSET" not in sql
+    assert '"Contact".id >' in sql
+
+
+@pytest.mark.parametrize("has_text", [True, False])
+def test_search_statement_compares_the_cursor_rank_as_real(has_text):
+    """Test that the cursor rank is cast to the real type of the computed rank
+
+    Args:
+        has_text (bool): Whether the statement ranks with ts_rank_cd
+    """
+
+    statement = search.search_statement(True, has_text)
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+
+    assert sql.count("CAST(%(last_rank)s AS REAL)") == 2
+
+
+def test_search_statement_uses_the_search_vector_config():
+    """Test that queries are parsed with websearch syntax and the vector's config"""
+
+    sql = str(search.search_statement(False).compile(dialect=postgresql.dialect()))
+
+    assert "plainto_tsquery" not in sql
+    assert f"websearch_to_tsquery('{models.SEARCH_CONFIG}'::regconfig" in sql
+
+
+def test_parse_query_splits_field_terms():
+    """Test that known field terms become filters and the rest stays full text"""
+
+    query = search.parse_query(
+        'Email:ann@x.com "john smith" OR jane -spam last:"van der" url:http://x'
+    )
+
+    assert query.text == '"john smith" OR jane -spam url:http://x'
+    assert query.filters == (("email", "ann@x.com"), ("last_name", "van der"))
+    assert query.has_text
+
+
+def test_field_only_query_skips_full_text_and_ranks_by_id():
+    """Test that filters alone are matched with ILIKE on their indexed columns"""
+
+    query = search.parse_query("name:50%")
+    statement = search.search_statement(False, query.has_text, query.fields)
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+
+    assert not query.has_text
+    assert "@@" not in sql
+    assert sql.count("ILIKE") == 2
+    assert 'ORDER BY "Contact".id ASC' in sql
+    assert search._search_params(query, limit=5, cursor=None) == {
+        "fetch": 6,
+        "name_1": "%50/%%",
+    }
+
+
+def test_compiled_search_query_binds_positional_args():
+    """Test that the precompiled SQL uses asyncpg placeholders in a fixed order"""
+
+    query = search.compiled_search_query(after_cursor=True)
+    cursor = search.encode_cursor(0.5, 7)
+    params = search._search_params(search.parse_query("business"), 10, cursor)
+
+    args = query.args(params)
+
+    assert "%(" not in query.sql
+    assert "LIMIT $1" in query.sql
+    assert args == [11, 7, 0.5, "business"]
+
+
+def test_suggest_statement_matches_every_word_as_prefix():
+    """Test that each word becomes an escaped prefix pattern on the indexed columns"""
+
+    statement = search._suggest_statement("ken 50%", limit=5)
+    compiled = statement.compile(dialect=postgresql.dialect())
+
+    assert str(compiled).count("ILIKE") == 6
+    assert compiled.params["last_name_1"] == "ken%"
+    assert compiled.params["last_name_2"] == "50/%%"
+
+
+@pytest.mark.asyncio
+async def test_suggest_skips_prefixes_shorter_than_the_minimum():
+    """Test that a prefix too short for the trigram indexes is not looked up"""
+
+    class Database:
+        async def fetch_all(self, query):
+            raise AssertionError("short prefixes must not reach the database")
+
+    assert await search.async_suggest(Database(), "  Wi ") == []
+
+
+def test_build_page_drops_rank_and_sets_cursor():
+    """Test that pages hold plain contact dicts and a cursor from the last row"""
+
+    class Row(tuple):
+        @property
+        def _mapping(self):
+            return dict(zip(search.CONTACT_KEYS + ("rank",), self))
+
+    rows = [Row((i, None, "A", "B", f"{i}@x", None, 1.0 / i)) for i in (1, 2, 3)]
+
+    page = search._build_page(rows, limit=2)
+
+    assert page["results"][1] == {
+        "id": 2,
+        "nimbus_id": None,
+        "first_name": "A",
+        "last_name": "B",
+        "email": "2@x",
+        "description": None,
+    }
+    assert search.decode_cursor(page["next_cursor"]) == (0.5, 2)
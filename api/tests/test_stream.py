@@ -0,0 +1,90 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from api import tasks
+from api.routers.v2 import routers
+from api.utils import models
+
+
+def fake_redis(stored, messages):
+    """Build a Redis double with a stored result and queued pub/sub messages"""
+
+    pubsub = MagicMock()
+    pubsub.__aenter__ = AsyncMock(return_value=pubsub)
+    pubsub.__aexit__ = AsyncMock(return_value=None)
+    pubsub.subscribe = AsyncMock()
+    pubsub.get_message = AsyncMock(side_effect=messages)
+
+    redis = MagicMock()
+    redis.get = AsyncMock(return_value=stored)
+    redis.pubsub.return_value = pubsub
+    return redis
+
+
+def encode(status, result):
+    return tasks.celery.backend.encode({"status": status, "result": result})
+
+
+async def collect(task_id):
+    return [event async for event in routers.task_result_events(task_id)]
+
+
+@pytest.mark.asyncio
+async def test_stream_pushes_published_result(mocker):
+    """Test that the result published after subscribing is pushed as one event
+
+    Args:
+        mocker (MockerFixture): pytest-mock fixture
+    """
+
+    page = {"results": [], "next_cursor": None}
+    redis = fake_redis(
+        stored=None,
+        messages=[None, {"data": encode("SUCCESS", page)}],
+    )
+    mocker.patch.object(routers, "get_async_redis", return_value=redis)
+
+    events = await collect("task-1")
+
+    assert events[0] == ": keep-alive\n\n"
+    assert events[1].startswith("event: result\n")
+    assert '"state": "SUCCESS"' in events[1]
+    redis.pubsub.return_value.subscribe.assert_awaited_once_with(
+        "celery-task-meta-task-1"
+    )
+
+
+@pytest.mark.asyncio
+async def test_stream_returns_stored_result_immediately(mocker):
+    """Test that an already finished task is pushed without waiting
+
+    Args:
+        mocker (MockerFixture): pytest-mock fixture
+    """
+
+    redis = fake_redis(
+        stored=encode("FAILURE", {"exc_type": "ValueError", "exc_message": ["boom"]}),
+        messages=[],
+    )
+    mocker.patch.object(routers, "get_async_redis", return_value=redis)
+
+    events = await collect("task-2")
+
+    assert len(events) == 1
+    assert '"state": "FAILURE"' in events[0]
+    assert "boom" in events[0]
+
+
+def test_enrichment_status_does_not_create_the_job_state():
+    """Test that reading the status of a job that never ran writes nothing"""
+
+    db = MagicMock()
+    db.get.return_value = None
+
+    status = routers.get_enrichment_status(db)
+
+    assert status == {"name": tasks.ENRICHMENT_JOB, "state": {}}
+    db.get.assert_called_once_with(models.JobState, tasks.ENRICHMENT_JOB)
+    db.add.assert_not_called()
+    db.flush.assert_not_called()
@@ -0,0 +1,564 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from api import tasks
+from api.utils import models
+from api.utils.nimbus import BaseNimbusAPIClient, NimbusContact, NimbusContactsResponse
+
+
+class FakeRow(SimpleNamespace):
+    """Stand-in for the Core rows streamed by crud.iter_contact_chunks"""
+
+    def __init__(self, **values):
+        super().__init__(**values, sync_hash=models.sync_hash(values))
+
+    @property
+    def _mapping(self):
+        return dict(vars(self))
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+def test_reconcile_all_contacts_writes_per_chunk(loop, mocker):
+    """Test that every chunk is resolved and committed on its own, and that only
+    the contacts changed by their Nimbus record are written
+
+    Args:
+        loop (AbstractEventLoop): Event loop for the async client
+        mocker (MockerFixture): pytest-mock fixture
+    """
+
+    chunks = [
+        [
+            FakeRow(id=1, nimbus_id="n1", first_name="A", last_name="B", email="a@x"),
+            FakeRow(id=2, nimbus_id="n2", first_name="C", last_name="D", email="c@x"),
+        ],
+        [FakeRow(id=3, nimbus_id=None, first_name="E", last_name="F", email=None)],
+    ]
+    mocker.patch.object(tasks.crud, "iter_contact_chunks", return_value=iter(chunks))
+    bulk_update = mocker.patch.object(
+        tasks.crud, "bulk_update_contacts", return_value=[]
+    )
+
+    client = Mock()
+    client.resolve_ids = AsyncMock(
+        return_value={
+            "n1": NimbusContact(id="n1", fields={"first name": ["Anna"]}),
+            "n2": NimbusContact(id="n2", fields={"first name": ["C"]}),
+        }
+    )
+    client.resolve_emails = AsyncMock(return_value={})
+    db_session = Mock()
+
+    stats = tasks.reconcile_all_contacts(loop, client, db_session, chunk_size=2)
+
+    assert stats == {
+        "scanned": 3,
+        "changed": 1,
+        "unchanged": 1,
+        "conflicting": 0,
+        "skipped": 1,
+        "deferred": 0,
+    }
+    assert db_session.commit.call_count == 2
+    [update] = bulk_update.call_args_list[0].args[1]
+    assert update["id"] == 1
+    assert update["first_name"] == "Anna"
+    assert (update["nimbus_id"], update["last_name"]) == ("n1", "B")
+    assert bulk_update.call_args_list[1].args[1] == []
+
+
+def test_apply_remote_contacts_only_writes_differing_contacts(mocker):
+    """Test that a Nimbus record matching the stored hash leaves the contact alone
+
+    Args:
+        mocker (MockerFixture): pytest-mock fixture
+    """
+
+    bulk_update = mocker.patch.object(
+        tasks.crud, "bulk_update_contacts", return_value=[]
+    )
+    first = FakeRow(id=1, nimbus_id="n1", first_name="A", last_name="B", email="a@x")
+    second = FakeRow(id=2, nimbus_id="n2", first_name="C", last_name="D", email="c@x")
+
+    unchanged = NimbusContact(id="n1", fields={"first name": ["A"], "email": ["a@x"]})
+    changed = NimbusContact(id="n2", fields={"last name": ["Bell"]})
+
+    stats = tasks.apply_remote_contacts(Mock(), [(first, unchanged), (second, changed)])
+
+    assert stats == {"changed": 1, "unchanged": 1, "conflicting": 0}
+    [update] = bulk_update.call_args.args[1]
+    assert (update["id"], update["first_name"], update["last_name"]) == (2, "C", "Bell")
+
+
+def test_contacts_matching_one_record_get_its_nimbus_id_once(mocker):
+    """Test that two local contacts resolved to the same Nimbus record do not
+    both get linked to it
+
+    Args:
+        mocker (MockerFixture): pytest-mock fixture
+    """
+
+    bulk_update = mocker.patch.object(
+        tasks.crud, "bulk_update_contacts", return_value=[]
+    )
+    first = FakeRow(id=1, nimbus_id=None, first_name="A", last_name="B", email="a@x")
+    second = FakeRow(id=2, nimbus_id=None, first_name="A", last_name="B", email="b@x")
+    remote_contact = NimbusContact(id="n1", fields={"email": ["a@x", "b@x"]})
+
+    stats = tasks.apply_remote_contacts(
+        Mock(), [(first, remote_contact), (second, remote_contact)]
+    )
+
+    assert stats == {"changed": 1, "unchanged": 0, "conflicting": 1}
+    [update] = bulk_update.call_args.args[1]
+    assert (update["id"], update["nimbus_id"]) == (1, "n1")
+
+
+def test_email_taken_by_another_contact_is_not_written(mocker):
+    """Test that a Nimbus email change onto the email of another contact is left
+    out, whether that contact is in the chunk or only in the table
+
+    Args:
+        mocker (MockerFixture): pytest-mock fixture
+    """
+
+    # g@x belongs to a contact outside the chunk, so the UPDATE of 3 fails
+    bulk_update = mocker.patch.object(
+        tasks.crud,
+        "bulk_update_contacts",
+        side_effect=lambda db, contacts: [c for c in contacts if c["id"] == 3],
+    )
+    first = FakeRow(id=1, nimbus_id="n1", first_name="A", last_name="B", email="a@x")
+    second = FakeRow(id=2, nimbus_id="n2", first_name="C", last_name="D", email="c@x")
+    third = FakeRow(id=3, nimbus_id="n3", first_name="E", last_name="F", email="e@x")
+
+    stats = tasks.apply_remote_contacts(
+        Mock(),
+        [
+            (first, NimbusContact(id="n1", fields={"last name": ["Bell"]})),
+            (second, NimbusContact(id="n2", fields={"email": ["A@x"]})),
+            (third, NimbusContact(id="n3", fields={"email": ["G@x"]})),
+        ],
+    )
+
+    assert stats == {"changed": 1, "unchanged": 0, "conflicting": 2}
+    written = bulk_update.call_args.args[1]
+    assert [update["id"] for update in written] == [1, 3]
+
+
+def _enrichment_run(mocker, loop, state, chunks):
+    """Patch the Redis lock, the session and the Nimbus client of an enrichment run
+
+    Args:
+        mocker (MockerFixture): pytest-mock fixture
+        loop (AbstractEventLoop): Event loop for the async client
+        state (Dict[str, Any]): Stored JobState of the job
+        chunks (List[List[FakeRow]]): Contact chunks left to enrich
+
+    Returns:
+        SimpleNamespace: The patched lock, session, chunk iterator and cache
+    """
+
+    lock = mocker.patch.object(tasks, "get_redis").return_value.lock.return_value
+    lock.acquire.return_value = True
+    db_session = mocker.patch.object(
+        tasks, "SessionLocal"
+    ).return_value.__enter__.return_value
+    db_session.query.return_value.count.return_value = 4
+    mocker.patch.object(
+        tasks.crud, "get_job_state", return_value=SimpleNamespace(state=state)
+    )
+    mocker.patch.object(tasks.crud, "save_job_state")
+    mocker.patch.object(tasks.crud, "bulk_update_contacts", return_value=[])
+    mocker.patch.object(
+        tasks, "nimbus_event_loop"
+    ).return_value.__enter__.return_value = (
+        loop,
+        Mock(),
+    )
+    mocker.patch.object(tasks, "defer_contacts", return_value=0)
+    mocker.patch.object(tasks.task_enrich_contacts, "update_state")
+
+    return SimpleNamespace(
+        lock=lock,
+        db_session=db_session,
+        chunks=mocker.patch.object(
+            tasks.crud, "iter_contact_chunks", return_value=iter(chunks)
+        ),
+        search_cache=mocker.patch.object(tasks, "search_cache"),
+    )
+
+
+def test_enrichment_resumes_after_the_last_checkpoint(loop, mocker):
+    """Test that an interrupted run continues after the stored last_id, and that
+    the search cache is invalidated once the linked contacts are committed
+
+    Args:
+        loop (AbstractEventLoop): Event loop for the async client
+        mocker (MockerFixture): pytest-mock fixture
+    """
+
+    run = _enrichment_run(
+        mocker,
+        loop,
+        {"status": "running", "last_id": 2, "processed": 2, "matched": 1},
+        [
+            [
+                FakeRow(
+                    id=3, nimbus_id=None, first_name="A", last_name="B", email="a@x"
+                ),
+                FakeRow(
+                    id=4, nimbus_id=None, first_name="C", last_name="D", email="c@x"
+                ),
+            ]
+        ],
+    )
+    mocker.patch.object(
+        tasks.load, "enrich_contacts", AsyncMock(return_value=({3: "n3"}, []))
+    )
+
+    state = tasks.task_enrich_contacts(chunk_size=2)
+
+    assert run.chunks.call_args.kwargs["after_id"] == 2
+    assert state == {
+        "status": "completed",
+        "last_id": 4,
+        "processed": 4,
+        "matched": 2,
+        "total": 4,
+    }
+    assert run.db_session.commit.call_count == 2
+    run.search_cache.invalidate.assert_called_once()
+    run.lock.release.assert_called_once()
+
+
+def test_enrichment_returns_at_once_when_already_completed(loop, mocker):
+    """Test that a completed job is not run again
+
+    Args:
+        loop (AbstractEventLoop): Event loop for the async client
+        mocker (MockerFixture): pytest-mock fixture
+    """
+
+    completed = {"status": "completed", "last_id": 4, "processed": 4, "matched": 2}
+    run = _enrichment_run(mocker, loop, completed, [])
+
+    assert tasks.task_enrich_contacts() == completed
+    run.chunks.assert_not_called()
+    run.db_session.commit.assert_not_called()
+    run.lock.release.assert_called_once()
+
+
+def test_reconcile_contacts_defers_failed_batches(loop, mocker):
+    """Test that contacts of a failed batch go to the retry queue
+
+    Args:
+        loop (AbstractEventLoop): Event loop for the async client
+        mocker (MockerFixture): pytest-mock fixture
+    """
+
+    redis_client = mocker.patch.object(tasks, "get_redis").return_value
+    mocker.patch.object(tasks.crud, "bulk_update_contacts", return_value=[])
+
+    chunk = [
+        FakeRow(id=1, nimbus_id="n1", first_name="A", last_name="B", email="a@x"),
+        FakeRow(id=2, nimbus_id=None, first_name="C", last_name="D", email="c@x"),
+    ]
+    client = Mock()
+    client.resolve_ids = AsyncMock(return_value={})
+    client.resolve_emails = AsyncMock(return_value=None)
+
+    stats = tasks.reconcile_contacts(loop, client, Mock(), chunk)
+
+    assert stats == {
+        "scanned": 2,
+        "changed": 0,
+        "unchanged": 0,
+        "conflicting": 0,
+        "skipped": 0,
+        "deferred": 1,
+    }
+    redis_client.sadd.assert_called_once_with(tasks.RETRY_QUEUE_KEY, 2)
+
+
+def _updated_records_client(pages):
+    """Build a client serving the given pages of modified Nimbus records
+
+    Args:
+        pages (List[List[NimbusContact]]): Records of every page
+
+    Returns:
+        Mock: Client with the real query and pagination helpers
+    """
+
+    base = BaseNimbusAPIClient()
+    responses = [
+        NimbusContactsResponse(resources=records, meta={"pages": len(pages)})
+        for records in pages
+    ]
+
+    return Mock(
+        updated_since_query=base.updated_since_query,
+        has_next_page=base.has_next_page,
+        list_contacts=AsyncMock(side_effect=responses),
+    )
+
+
+def test_sync_changed_contacts_pages_through_the_updated_records(loop, mocker):
+    """Test that every page of the updated since query is applied and committed
+
+    Args:
+        loop (AbstractEventLoop): Event loop for the async client
+        mocker (MockerFixture): pytest-mock fixture
+    """
+
+    mocker.patch.object(tasks.crud, "list_contacts_by_nimbus_ids", return_value=[])
+    mocker.patch.object(tasks.crud, "list_contacts_by_emails", return_value=[])
+    apply = mocker.patch.object(
+        tasks,
+        "apply_remote_contacts",
+        return_value={"changed": 0, "unchanged": 0, "conflicting": 0},
+    )
+    client = _updated_records_client(
+        [
+            [NimbusContact(id="n1", fields={}), NimbusContact(id="n2", fields={})],
+            [NimbusContact(id="n3", fields={})],
+        ]
+    )
+    db_session = Mock()
+    since = datetime(2024, 1, 1, 12, tzinfo=timezone.utc)
+
+    stats = tasks.sync_changed_contacts(loop, client, db_session, since)
+
+    query = client.updated_since_query(since - tasks.SYNC_WATERMARK_OVERLAP)
+    assert [call.kwargs for call in client.list_contacts.call_args_list] == [
+        {"page": 1, "query": query},
+        {"page": 2, "query": query},
+    ]
+    assert stats == {"scanned": 3, "changed": 0, "unchanged": 0, "conflicting": 0}
+    assert apply.call_count == db_session.commit.call_count == 2
+
+
+def test_sync_changed_contacts_matches_by_nimbus_id_before_email(loop, mocker):
+    """Test that a record linked by nimbus_id is not looked up by email again
+
+    Args:
+        loop (AbstractEventLoop): Event loop for the async client
+        mocker (MockerFixture): pytest-mock fixture
+    """
+
+    linked = FakeRow(id=1, nimbus_id="n1", first_name="A", last_name="B", email="a@x")
+    unlinked = FakeRow(id=2, nimbus_id=None, first_name="C", last_name="D", email="c@x")
+    mocker.patch.object(
+        tasks.crud, "list_contacts_by_nimbus_ids", return_value=[linked]
+    )
+    by_emails = mocker.patch.object(
+        tasks.crud, "list_contacts_by_emails", return_value=[unlinked]
+    )
+    apply = mocker.patch.object(
+        tasks,
+        "apply_remote_contacts",
+        return_value={"changed": 2, "unchanged": 0, "conflicting": 0},
+    )
+    first = NimbusContact(id="n1", fields={"email": ["a@x"]})
+    second = NimbusContact(id="n2", fields={"email": ["C@x"]})
+    client = _updated_records_client([[first, second]])
+
+    tasks.sync_changed_contacts(loop, client, Mock(), datetime.now(timezone.utc))
+
+    assert by_emails.call_args.args[1] == ["c@x"]
+    assert apply.call_args.args[1] == [(linked, first), (unlinked, second)]
+
+
+def test_sync_changed_contacts_fails_when_nimbus_cannot_be_read(loop, mocker):
+    """Test that a failed page fails the run without committing
+
+    Args:
+        loop (AbstractEventLoop): Event loop for the async client
+        mocker (MockerFixture): pytest-mock fixture
+    """
+
+    client = _updated_records_client([])
+    client.list_contacts = AsyncMock(return_value=None)
+    db_session = Mock()
+
+    assert (
+        tasks.sync_changed_contacts(
+            loop, client, db_session, datetime.now(timezone.utc)
+        )
+        is None
+    )
+    db_session.commit.assert_not_called()
+
+
+def test_complete_sync_moves_the_watermark_after_a_successful_run(mocker):
+    """Test that a successful run saves its start time as the next watermark
+
+    Args:
+        mocker (MockerFixture): pytest-mock fixture
+    """
+
+    mocker.patch.object(tasks, "search_cache")
+    mocker.patch.object(
+        tasks.crud,
+        "get_job_state",
+        return_value=SimpleNamespace(state={"watermark": "2024-01-01T00:00:00"}),
+    )
+    save = mocker.patch.object(tasks.crud, "save_job_state")
+    db_session = Mock()
+    started_at = datetime(2024, 1, 2, tzinfo=timezone.utc)
+
+    outcome = tasks.complete_sync(
+        db_session, "incremental", started_at, {"scanned": 1, "changed": 0}
+    )
+
+    assert outcome["status"] == "completed"
+    save.assert_called_once_with(
+        db_session, tasks.SYNC_JOB, {"watermark": started_at.isoformat()}
+    )
+    db_session.commit.assert_called_once()
+
+
+def test_complete_sync_keeps_the_watermark_after_a_failed_run(mocker):
+    """Test that a failed run leaves the watermark where it was
+
+    Args:
+        mocker (MockerFixture): pytest-mock fixture
+    """
+
+    search_cache = mocker.patch.object(tasks, "search_cache")
+    mocker.patch.object(
+        tasks.crud,
+        "get_job_state",
+        return_value=SimpleNamespace(state={"watermark": "2024-01-01T00:00:00"}),
+    )
+    save = mocker.patch.object(tasks.crud, "save_job_state")
+    db_session = Mock()
+
+    outcome = tasks.complete_sync(
+        db_session, "full", datetime(2024, 1, 2, tzinfo=timezone.utc), None
+    )
+
+    assert outcome == {"mode": "full", "status": "failed"}
+    save.assert_not_called()
+    db_session.commit.assert_not_called()
+    search_cache.invalidate.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    "first_id, last_id, shards, expected",
+    [
+        (None, None, 4, []),
+        (1, 10, 4, [(0, 3), (3, 6), (6, 9), (9, 10)]),
+        (5, 8, 4, [(4, 5), (5, 6), (6, 7), (7, 8)]),
+        (1, 3, 8, [(0, 1), (1, 2), (2, 3)]),
+    ],
+)
+def test_shard_ranges_cover_the_id_range(first_id, last_id, shards, expected):
+    """Test that shards are contiguous, never empty and cover every id
+
+    Args:
+        first_id (Optional[int]): Lowest contact id
+        last_id (Optional[int]): Highest contact id
+        shards (int): Maximum number of shards
+        expected (List[Tuple[int, int]]): Expected (after_id, until_id) bounds
+    """
+
+    assert tasks.shard_ranges(first_id, last_id, shards, min_size=1) == expected
+
+
+def test_update_contacts_skips_while_a_run_holds_the_lock(mocker):
+    """Test that an overlapping run returns without touching the database
+
+    Args:
+        mocker (MockerFixture): pytest-mock fixture
+    """
+
+    lock = mocker.patch.object(tasks, "sync_lock").return_value
+    lock.acquire.return_value = False
+    session = mocker.patch.object(tasks, "SessionLocal")
+
+    assert tasks.task_update_contacts(full=True) == {"status": "skipped"}
+    session.assert_not_called()
+    lock.release.assert_not_called()
+
+
+def test_finish_sync_aggregates_shards_and_releases_the_lock(mocker):
+    """Test that shard statistics are summed and the lock is released
+
+    Args:
+        mocker (MockerFixture): pytest-mock fixture
+    """
+
+    mocker.patch.object(tasks, "SessionLocal")
+    complete_sync = mocker.patch.object(
+        tasks, "complete_sync", return_value={"mode": "full", "status": "completed"}
+    )
+    release = mocker.patch.object(tasks, "release_sync_lock")
+    results = [
+        {"status": "completed", "scanned": 3, "changed": 1},
+        {"status": "completed", "scanned": 2, "changed": 2},
+    ]
+
+    outcome = tasks.task_finish_sync(results, "2024-01-01T00:00:00+00:00", "token")
+
+    assert complete_sync.call_args.args[3] == {"scanned": 5, "changed": 3}
+    assert outcome["shards"] == 2 and outcome["failed_shards"] == 0
+    release.assert_called_once_with("token")
+
+
+def test_finish_sync_keeps_the_watermark_when_a_shard_failed(mocker):
+    """Test that a failed shard fails the run
+
+    Args:
+        mocker (MockerFixture): pytest-mock fixture
+    """
+
+    mocker.patch.object(tasks, "SessionLocal")
+    complete_sync = mocker.patch.object(
+        tasks, "complete_sync", return_value={"mode": "full", "status": "failed"}
+    )
+    mocker.patch.object(tasks, "release_sync_lock")
+    results = [
+        {"status": "completed", "scanned": 3, "changed": 1},
+        {"status": "failed", "after_id": 0, "until_id": 10},
+    ]
+
+    outcome = tasks.task_finish_sync(results, "2024-01-01T00:00:00+00:00", "token")
+
+    assert complete_sync.call_args.args[3] is None
+    assert outcome["failed_shards"] == 1
+
+
+@pytest.mark.parametrize(
+    "task, queue",
+    [
+        (tasks.task_full_text_search, tasks.SEARCH_QUEUE),
+        (tasks.task_update_contacts, tasks.SYNC_QUEUE),
+        (tasks.task_enrich_contacts, tasks.SYNC_QUEUE),
+        (tasks.task_retry_contacts, tasks.SYNC_QUEUE),
+        (tasks.task_sync_shard, tasks.SYNC_QUEUE),
+        (tasks.task_finish_sync, tasks.SYNC_QUEUE),
+    ],
+)
+def test_tasks_are_routed_to_their_queue(task, queue):
+    """Test that searches and background jobs are sent to separate queues
+
+    Args:
+        task (Task): Celery task
+        queue (str): Expected queue name
+    """
+
+    route = tasks.celery.amqp.router.route({}, task.name)
+
+    assert route["queue"].name == queue
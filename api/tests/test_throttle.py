@@ -0,0 +1,52 @@
+import time
+
+from api.utils.throttle import CircuitBreaker, TokenBucket
+
+
+def test_token_bucket_queues_callers_past_the_burst():
+    """Test that reservations beyond the burst wait one interval more each"""
+
+    bucket = TokenBucket("test", rate=10, capacity=2, redis_url=None)
+
+    waits = [bucket.reserve_local() for _ in range(4)]
+
+    assert waits[:2] == [0.0, 0.0]
+    assert 0.05 < waits[2] <= 0.1
+    assert 0.15 < waits[3] <= 0.2
+
+
+def test_circuit_breaker_opens_and_lets_one_trial_through():
+    """Test the closed, open, half open and closed transitions"""
+
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.01)
+
+    breaker.record_failure()
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.02)
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_circuit_breaker_reopens_after_a_failed_trial():
+    """Test that a failed trial opens the breaker without reaching the threshold"""
+
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=0.01)
+    for _ in range(5):
+        breaker.record_failure()
+
+    time.sleep(0.02)
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
@@ -0,0 +1,299 @@
+import functools
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+import redis
+from redis import asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "1024"))
+SEARCH_CACHE_LOCAL_TTL = int(os.getenv("SEARCH_CACHE_LOCAL_TTL", "30"))
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "300"))
+SEARCH_CACHE_REDIS_URL = os.getenv("SEARCH_CACHE_REDIS_URL", REDIS_URL)
+
+REDIS_TIMEOUT_SECONDS = 0.5
+REDIS_RETRY_AFTER_SECONDS = 30
+
+
+@functools.lru_cache(maxsize=None)
+def get_redis() -> redis.Redis:
+    """Return the shared Redis client used for locks and job coordination
+
+    Returns:
+        redis.Redis: Redis client for REDIS_URL
+    """
+
+    return redis.Redis.from_url(REDIS_URL)
+
+
+@functools.lru_cache(maxsize=None)
+def get_async_redis() -> aioredis.Redis:
+    """Return the shared asyncio Redis client used by request handlers
+
+    Returns:
+        aioredis.Redis: Redis client for REDIS_URL
+    """
+
+    return aioredis.Redis.from_url(REDIS_URL)
+
+
+def normalize_query(text: str) -> str:
+    """Normalize search text so equivalent queries share a cache entry
+
+    Args:
+        text (str): Search text
+
+    Returns:
+        str: Lower cased text with collapsed whitespace
+    """
+
+    return " ".join(text.lower().split())
+
+
+class LRUCache:
+    """Thread safe in-process LRU cache with a per-entry TTL"""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a cached value, or None if missing or expired
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            Optional[Any]: Cached value
+        """
+
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value, evicting the least recently used entry when full
+
+        Args:
+            key (str): Cache key
+            value (Any): Value to store
+        """
+
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove every entry"""
+
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SearchCache:
+    """Read-through cache for search result pages
+
+    Pages are looked up in an in-process LRU first and in Redis second. Redis
+    entries are stamped with a generation counter, and invalidation increments
+    the counter, so every process drops its shared entries at once. Local
+    entries expire after SEARCH_CACHE_LOCAL_TTL seconds, which bounds how long
+    other processes can serve a page after an invalidation. A Redis outage only
+    disables the shared level.
+    """
+
+    key_prefix = "search-cache"
+
+    def __init__(
+        self,
+        maxsize: int = SEARCH_CACHE_SIZE,
+        local_ttl: float = SEARCH_CACHE_LOCAL_TTL,
+        ttl: int = SEARCH_CACHE_TTL,
+        redis_url: Optional[str] = SEARCH_CACHE_REDIS_URL,
+    ) -> None:
+        self.local = LRUCache(maxsize=maxsize, ttl=local_ttl)
+        self.ttl = ttl
+        self.redis_url = redis_url
+        self._generation = 0
+        self._redis: Optional[redis.Redis] = None
+        self._aredis: Optional[aioredis.Redis] = None
+        self._redis_down_until = 0.0
+
+    @property
+    def generation_key(self) -> str:
+        return f"{self.key_prefix}:generation"
+
+    def key(self, text: str, limit: int, cursor: Optional[str]) -> str:
+        """Build the cache key for one page of a query
+
+        Args:
+            text (str): Search text
+            limit (int): Page size
+            cursor (Optional[str]): Cursor of the previous page
+
+        Returns:
+            str: Cache key
+        """
+
+        raw = json.dumps([normalize_query(text), limit, cursor])
+        return f"{self.key_prefix}:{hashlib.sha1(raw.encode()).hexdigest()}"
+
+    def _redis_available(self) -> bool:
+        return bool(self.redis_url) and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, e: Exception) -> None:
+        logger.warning(f"[!] Search cache Redis is unavailable: {e}")
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_AFTER_SECONDS
+
+    def _get_redis(self) -> redis.Redis:
+        if self._redis is None:
+            assert self.redis_url is not None
+            self._redis = redis.Redis.from_url(
+                self.redis_url, socket_timeout=REDIS_TIMEOUT_SECONDS
+            )
+        return self._redis
+
+    def _get_aredis(self) -> aioredis.Redis:
+        if self._aredis is None:
+            assert self.redis_url is not None
+            self._aredis = aioredis.Redis.from_url(
+                self.redis_url, socket_timeout=REDIS_TIMEOUT_SECONDS
+            )
+        return self._aredis
+
+    def _decode(
+        self, generation: Optional[bytes], raw: Optional[bytes]
+    ) -> Tuple[int, Optional[Any]]:
+        current = int(generation or 0)
+        if raw is None:
+            return current, None
+
+        entry = json.loads(raw)
+        if entry["generation"] != current:
+            return current, None
+
+        return current, entry["value"]
+
+    def _encode(self, generation: int, value: Any) -> str:
+        return json.dumps({"generation": generation, "value": value})
+
+    def get_or_load(self, key: str, loader: Callable[[], Any]) -> Any:
+        """Return the cached value for key, calling loader on a miss
+
+        Args:
+            key (str): Cache key
+            loader (Callable[[], Any]): Function computing the value
+
+        Returns:
+            Any: Cached or freshly loaded value
+        """
+
+        local_generation = self._generation
+        value = self.local.get(key)
+        if value is not None:
+            return value
+
+        remote_generation = None
+        if self._redis_available():
+            try:
+                generation, raw = self._get_redis().mget(self.generation_key, key)
+                remote_generation, value = self._decode(generation, raw)
+            except redis.RedisError as e:
+                self._redis_failed(e)
+
+        if value is None:
+            value = loader()
+            if remote_generation is not None:
+                try:
+                    self._get_redis().set(
+                        key, self._encode(remote_generation, value), ex=self.ttl
+                    )
+                except redis.RedisError as e:
+                    self._redis_failed(e)
+
+        if local_generation == self._generation:
+            self.local.set(key, value)
+
+        return value
+
+    async def aget_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Async variant of get_or_load for handlers running on the event loop
+
+        Args:
+            key (str): Cache key
+            loader (Callable[[], Awaitable[Any]]): Coroutine function computing the value
+
+        Returns:
+            Any: Cached or freshly loaded value
+        """
+
+        local_generation = self._generation
+        value = self.local.get(key)
+        if value is not None:
+            return value
+
+        remote_generation = None
+        if self._redis_available():
+            try:
+                generation, raw = await self._get_aredis().mget(
+                    self.generation_key, key
+                )
+                remote_generation, value = self._decode(generation, raw)
+            except redis.RedisError as e:
+                self._redis_failed(e)
+
+        if value is None:
+            value = await loader()
+            if remote_generation is not None:
+                try:
+                    await self._get_aredis().set(
+                        key, self._encode(remote_generation, value), ex=self.ttl
+                    )
+                except redis.RedisError as e:
+                    self._redis_failed(e)
+
+        if local_generation == self._generation:
+            self.local.set(key, value)
+
+        return value
+
+    def invalidate(self) -> None:
+        """Drop every cached page in this process and in Redis"""
+
+        self._generation += 1
+        self.local.clear()
+
+        if self._redis_available():
+            try:
+                self._get_redis().incr(self.generation_key)
+            except redis.RedisError as e:
+                self._redis_failed(e)
+
+        logger.info("[+] Search cache invalidated")
+
+
+search_cache = SearchCache()
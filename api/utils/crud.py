@@ -1,13 +1,64 @@
-from typing import List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from . import models, schema
 
+UPSERT_COLUMNS = ("nimbus_id", "first_name", "last_name", "email", "description")
+# Columns read and written by the Nimbus sync
+SYNC_COLUMNS = (
+    models.Contact.id,
+    models.Contact.nimbus_id,
+    models.Contact.first_name,
+    models.Contact.last_name,
+    models.Contact.email,
+    models.Contact.sync_hash,
+)
+
+
+def _upsert_statement(contacts: List[Dict[str, Any]]) -> Insert:
+    """Build an INSERT that updates the existing contact with the same email
+
+    The conflict target is the unique lower(email) index, so matching is case
+    insensitive and needs no pre-read. A nimbus_id already set is not cleared
+    by a row without one. Emails must not repeat within the rows, since ON
+    CONFLICT DO UPDATE cannot touch the same contact twice in one statement.
+
+    Args:
+        contacts (List[Dict[str, Any]]): Rows with the UPSERT_COLUMNS
+
+    Returns:
+        Insert: PostgreSQL INSERT ... ON CONFLICT statement
+    """
+
+    rows = [
+        {column: contact.get(column) for column in UPSERT_COLUMNS}
+        for contact in contacts
+    ]
+    statement = insert(models.Contact).values(rows)
+    excluded = statement.excluded
+
+    return statement.on_conflict_do_update(
+        index_elements=[func.lower(models.Contact.email)],
+        set_={
+            "nimbus_id": func.coalesce(excluded.nimbus_id, models.Contact.nimbus_id),
+            "first_name": excluded.first_name,
+            "last_name": excluded.last_name,
+            "email": excluded.email,
+            "description": excluded.description,
+        },
+    )
+
 
 def save_contact(db: Session, contact: schema.Contact) -> models.Contact:
     """Performs the save operation for a contact
 
+    A contact with the same email (case insensitive) is updated in place.
+
     Args:
         db (Session): Database session
         contact (schema.Contact): Contact to be saved
@@ -16,12 +67,12 @@ def save_contact(db: Session, contact: schema.Contact) -> models.Contact:
         models.Contact: Saved contact
     """
 
-    contact_model = models.Contact(**contact.model_dump())
-    db.add(contact_model)
+    statement = _upsert_statement([contact.model_dump()])
+    contact_id = db.execute(statement.returning(models.Contact.id)).scalar_one()
+    models.flag_search_cache_stale(db)
     db.commit()
-    db.refresh(contact_model)
 
-    return contact_model
+    return db.get(models.Contact, contact_id)
 
 
 def get_contact(
@@ -31,14 +82,16 @@ def get_contact(
 
     Args:
         db (Session): Database session
-        email (str): Email of the contact to be retrieved
+        email (str): Email of the contact to be retrieved, case insensitive
         nimbus_id (Optional[str], optional): Nimbus ID of the contact to be retrieved. Defaults to None.
 
     Returns:
         models.Contact: Retrieved contact
     """
 
-    query = db.query(models.Contact).filter(models.Contact.email == email)
+    query = db.query(models.Contact).filter(
+        func.lower(models.Contact.email) == email.lower()
+    )
 
     if nimbus_id:
         return query.filter(models.Contact.nimbus_id == nimbus_id).first()
@@ -59,3 +112,232 @@ def list_contacts(db: Session) -> List[models.Contact]:
     query = db.query(models.Contact)
 
     return query.all()
+
+
+def get_contact_id_range(db: Session) -> Tuple[Optional[int], Optional[int]]:
+    """Return the lowest and highest contact ids
+
+    Args:
+        db (Session): Database session
+
+    Returns:
+        Tuple[Optional[int], Optional[int]]: First and last id, None if there
+            are no contacts
+    """
+
+    first_id, last_id = db.execute(
+        select(func.min(models.Contact.id), func.max(models.Contact.id))
+    ).one()
+
+    return first_id, last_id
+
+
+def iter_contact_chunks(
+    db: Session, chunk_size: int, after_id: int = 0, until_id: Optional[int] = None
+) -> Iterator[List[Row]]:
+    """Stream the synced columns of contacts in id-ordered chunks
+
+    Chunks are read with an id keyset rather than a server-side cursor, so the
+    caller can commit between chunks. Rows are returned as plain Core rows and
+    never enter the session identity map.
+
+    Args:
+        db (Session): Database session
+        chunk_size (int): Number of contacts per chunk
+        after_id (int): Only contacts with a greater id. Defaults to 0.
+        until_id (Optional[int]): Only contacts up to this id. Defaults to None.
+
+    Yields:
+        Iterator[List[Row]]: Chunks of contact rows
+    """
+
+    last_id = after_id
+
+    while True:
+        query = (
+            select(*SYNC_COLUMNS)
+            .where(models.Contact.id > last_id)
+            .order_by(models.Contact.id)
+            .limit(chunk_size)
+        )
+        if until_id is not None:
+            query = query.where(models.Contact.id <= until_id)
+        rows = db.execute(query).all()
+
+        if not rows:
+            return
+
+        yield rows
+        last_id = rows[-1].id
+
+
+def list_contact_rows(db: Session, ids: List[int]) -> List[Row]:
+    """Read the synced columns of the given contacts, in id order
+
+    Args:
+        db (Session): Database session
+        ids (List[int]): Contact ids
+
+    Returns:
+        List[Row]: Contact rows, without the ids that no longer exist
+    """
+
+    if not ids:
+        return []
+
+    query = (
+        select(*SYNC_COLUMNS)
+        .where(models.Contact.id.in_(ids))
+        .order_by(models.Contact.id)
+    )
+
+    return db.execute(query).all()
+
+
+def bulk_update_contacts(
+    db: Session, contacts: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """Update many contacts with a single executemany UPDATE, without committing
+
+    Callers only pass the contacts that actually change: every UPDATE rewrites
+    the row and its generated search_vector and GIN entries, even when the
+    values stay the same.
+
+    The UPDATE runs in a SAVEPOINT. If it breaks the unique email or nimbus_id
+    index, e.g. because another contact already holds the value, the contacts
+    are updated one at a time in their own SAVEPOINT and the failing ones are
+    left unchanged, so one clash does not fail the whole transaction.
+
+    Args:
+        db (Session): Database session
+        contacts (List[Dict[str, Any]]): Rows with id, nimbus_id, first_name,
+            last_name and email
+
+    Returns:
+        List[Dict[str, Any]]: Contacts left unchanged because of a unique index
+    """
+
+    if not contacts:
+        return []
+
+    statement = (
+        update(models.Contact)
+        .where(models.Contact.id == bindparam("contact_id"))
+        .values(
+            nimbus_id=bindparam("nimbus_id"),
+            first_name=bindparam("first_name"),
+            last_name=bindparam("last_name"),
+            email=bindparam("email"),
+        )
+    )
+    params = [
+        {
+            "contact_id": contact["id"],
+            "nimbus_id": contact["nimbus_id"],
+            "first_name": contact["first_name"],
+            "last_name": contact["last_name"],
+            "email": contact["email"],
+        }
+        for contact in contacts
+    ]
+
+    try:
+        with db.begin_nested():
+            db.execute(statement, params)
+        return []
+    except IntegrityError:
+        pass
+
+    conflicting = []
+    for contact, contact_params in zip(contacts, params):
+        try:
+            with db.begin_nested():
+                db.execute(statement, contact_params)
+        except IntegrityError:
+            conflicting.append(contact)
+
+    return conflicting
+
+
+def list_contacts_by_nimbus_ids(db: Session, nimbus_ids: List[str]) -> List[Row]:
+    """Read the synced columns of the contacts linked to the given Nimbus ids
+
+    Args:
+        db (Session): Database session
+        nimbus_ids (List[str]): Nimbus ids
+
+    Returns:
+        List[Row]: Contact rows with the columns of SYNC_COLUMNS
+    """
+
+    if not nimbus_ids:
+        return []
+
+    query = select(*SYNC_COLUMNS).where(models.Contact.nimbus_id.in_(nimbus_ids))
+
+    return db.execute(query).all()
+
+
+def list_contacts_by_emails(db: Session, emails: List[str]) -> List[Row]:
+    """Read the synced columns of the unlinked contacts with the given emails
+
+    Args:
+        db (Session): Database session
+        emails (List[str]): Lower cased emails
+
+    Returns:
+        List[Row]: Rows with the columns of SYNC_COLUMNS, of contacts without a
+            nimbus_id
+    """
+
+    if not emails:
+        return []
+
+    query = select(*SYNC_COLUMNS).where(
+        models.Contact.nimbus_id.is_(None),
+        func.lower(models.Contact.email).in_(emails),
+    )
+
+    return db.execute(query).all()
+
+
+def get_job_state(db: Session, name: str) -> models.JobState:
+    """Retrieve the state of a background job, creating it if missing
+
+    Args:
+        db (Session): Database session
+        name (str): Job name
+
+    Returns:
+        models.JobState: Job state
+    """
+
+    job = db.get(models.JobState, name)
+
+    if job is None:
+        job = models.JobState(name=name, state={})
+        db.add(job)
+        db.flush()
+
+    return job
+
+
+def save_job_state(db: Session, name: str, state: Dict[str, Any]) -> models.JobState:
+    """Store the state of a background job without committing
+
+    The caller commits, so the checkpoint lands in the same transaction as the
+    work it describes.
+
+    Args:
+        db (Session): Database session
+        name (str): Job name
+        state (Dict[str, Any]): New job state
+
+    Returns:
+        models.JobState: Job state
+    """
+
+    job = get_job_state(db, name)
+    job.state = dict(state)
+
+    return job
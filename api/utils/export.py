@@ -0,0 +1,97 @@
+import csv
+import io
+from typing import Any, AsyncIterator, Dict, List
+
+import databases
+import orjson
+from sqlalchemy import select
+
+from . import models
+
+EXPORT_BATCH_SIZE = 500
+
+NDJSON_COLUMNS = (
+    models.Contact.id,
+    models.Contact.nimbus_id,
+    models.Contact.first_name,
+    models.Contact.last_name,
+    models.Contact.email,
+    models.Contact.description,
+)
+
+# Same header as api/data/contacts.csv, so an export can be re-imported
+CSV_COLUMNS = (
+    models.Contact.first_name,
+    models.Contact.last_name,
+    models.Contact.email,
+    models.Contact.description,
+)
+
+
+async def _iter_batches(
+    db: databases.Database, columns: tuple
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Read every contact through a server-side cursor in small batches
+
+    Args:
+        db (databases.Database): Connected database pool
+        columns (tuple): Columns to select
+
+    Yields:
+        AsyncIterator[List[Dict[str, Any]]]: Batches of at most EXPORT_BATCH_SIZE rows
+    """
+
+    query = select(*columns).order_by(models.Contact.id)
+    batch = []
+
+    async for row in db.iterate(query):
+        # dict(row) would go through the deprecated Record.keys()
+        batch.append({key: row[key] for key in row})
+        if len(batch) >= EXPORT_BATCH_SIZE:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+async def iter_ndjson(db: databases.Database) -> AsyncIterator[bytes]:
+    """Stream the contact book as newline delimited JSON
+
+    The generator is only advanced when the previous chunk has been sent, so a
+    slow client throttles the cursor and memory stays bounded by one batch.
+
+    Args:
+        db (databases.Database): Connected database pool
+
+    Yields:
+        AsyncIterator[bytes]: NDJSON chunks
+    """
+
+    async for batch in _iter_batches(db, NDJSON_COLUMNS):
+        yield b"".join(orjson.dumps(contact) + b"\n" for contact in batch)
+
+
+async def iter_csv(db: databases.Database) -> AsyncIterator[bytes]:
+    """Stream the contact book as CSV with the import file header
+
+    Args:
+        db (databases.Database): Connected database pool
+
+    Yields:
+        AsyncIterator[bytes]: CSV chunks, starting with the header
+    """
+
+    fieldnames = [column.name for column in CSV_COLUMNS]
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, lineterminator="\n")
+    writer.writeheader()
+
+    async for batch in _iter_batches(db, CSV_COLUMNS):
+        writer.writerows(batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode()
@@ -0,0 +1,311 @@
+import glob
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable
+
+from fastapi import FastAPI, Request, Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = "contact_book"
+
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+CELERY_METRICS_PORT = int(os.getenv("CELERY_METRICS_PORT", "9100"))
+
+# Requests, queries and pool waits are mostly sub-second, Nimbus calls and
+# background runs can take minutes
+FAST_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests handled by the API",
+    ["method", "route", "status"],
+    namespace=NAMESPACE,
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_seconds",
+    "Time until the response headers are sent",
+    ["method", "route"],
+    namespace=NAMESPACE,
+    buckets=FAST_BUCKETS,
+)
+
+DB_QUERY_SECONDS = Histogram(
+    "db_query_seconds",
+    "Duration of statements executed through the SQLAlchemy engine",
+    namespace=NAMESPACE,
+    buckets=FAST_BUCKETS,
+)
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_seconds",
+    "Time spent waiting for a connection from the SQLAlchemy pool",
+    namespace=NAMESPACE,
+    buckets=FAST_BUCKETS,
+)
+
+SEARCH_SECONDS = Histogram(
+    "search_seconds",
+    "Duration of full text search queries, excluding cache hits",
+    ["backend"],
+    namespace=NAMESPACE,
+    buckets=FAST_BUCKETS,
+)
+
+NIMBUS_REQUEST_SECONDS = Histogram(
+    "nimbus_request_seconds",
+    "Duration of Nimbus HTTP calls, including retries",
+    ["client", "outcome"],
+    namespace=NAMESPACE,
+    buckets=SLOW_BUCKETS,
+)
+NIMBUS_RETRIES = Counter(
+    "nimbus_retries_total",
+    "Nimbus HTTP calls that were retried",
+    ["client", "reason"],
+    namespace=NAMESPACE,
+)
+NIMBUS_CACHE = Counter(
+    "nimbus_cache_total",
+    "Nimbus lookups by response cache result",
+    ["result"],
+    namespace=NAMESPACE,
+)
+NIMBUS_THROTTLE_SECONDS = Histogram(
+    "nimbus_throttle_seconds",
+    "Time spent waiting for a Nimbus rate limit token",
+    namespace=NAMESPACE,
+    buckets=FAST_BUCKETS,
+)
+NIMBUS_CIRCUIT = Counter(
+    "nimbus_circuit_transitions_total",
+    "Nimbus circuit breaker transitions, by new state",
+    ["state"],
+    namespace=NAMESPACE,
+)
+
+TASK_SECONDS = Histogram(
+    "task_seconds",
+    "Duration of Celery task runs",
+    ["task", "state"],
+    namespace=NAMESPACE,
+    buckets=SLOW_BUCKETS,
+)
+SYNC_RUNS = Counter(
+    "sync_runs_total",
+    "Nimbus sync runs, by mode and final status",
+    ["mode", "status"],
+    namespace=NAMESPACE,
+)
+SYNC_CONTACTS = Counter(
+    "sync_contacts_total",
+    "Contacts handled by the Nimbus sync, by outcome",
+    ["mode", "outcome"],
+    namespace=NAMESPACE,
+)
+ENRICHMENT_CONTACTS = Counter(
+    "enrichment_contacts_total",
+    "Contacts handled by the Nimbus enrichment job, by outcome",
+    ["outcome"],
+    namespace=NAMESPACE,
+)
+IMPORTED_CONTACTS = Counter(
+    "imported_contacts_total",
+    "Contacts inserted by the CSV importer",
+    namespace=NAMESPACE,
+)
+IMPORT_SECONDS = Histogram(
+    "import_seconds",
+    "Duration of CSV imports",
+    namespace=NAMESPACE,
+    buckets=SLOW_BUCKETS,
+)
+
+
+def get_registry() -> CollectorRegistry:
+    """Return the registry to expose
+
+    When PROMETHEUS_MULTIPROC_DIR is set, metrics are written to files by every
+    process and collected from there, otherwise the default registry is used.
+
+    Returns:
+        CollectorRegistry: Registry with every metric of this process or of all
+            processes sharing PROMETHEUS_MULTIPROC_DIR
+    """
+
+    if not PROMETHEUS_MULTIPROC_DIR:
+        return REGISTRY
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+
+    return registry
+
+
+async def metrics_response() -> Response:
+    """Render the metrics in the Prometheus text format
+
+    Returns:
+        Response: Plain text exposition
+    """
+
+    return Response(generate_latest(get_registry()), media_type=CONTENT_TYPE_LATEST)
+
+
+def route_name(request: Request) -> str:
+    """Return the route template of a request, e.g. /api/v1/search
+
+    Templates are used instead of raw paths, so path parameters such as task ids
+    do not create a time series each.
+
+    Args:
+        request (Request): Handled request
+
+    Returns:
+        str: Route template, or "<unmatched>" if no route matched
+    """
+
+    route = request.scope.get("route")
+
+    return getattr(route, "path", "<unmatched>")
+
+
+async def record_request(
+    request: Request, call_next: Callable[[Request], Awaitable[Response]]
+) -> Response:
+    """HTTP middleware counting requests and timing them per route
+
+    Args:
+        request (Request): Incoming request
+        call_next (Callable[[Request], Awaitable[Response]]): Next ASGI handler
+
+    Returns:
+        Response: Response of the route
+    """
+
+    started = time.perf_counter()
+    status = 500
+
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = route_name(request)
+        HTTP_REQUEST_SECONDS.labels(request.method, route).observe(
+            time.perf_counter() - started
+        )
+        HTTP_REQUESTS.labels(request.method, route, str(status)).inc()
+
+
+def instrument_app(app: FastAPI) -> None:
+    """Time every request of the app and serve the metrics on /metrics
+
+    Args:
+        app (FastAPI): Application to instrument
+    """
+
+    app.middleware("http")(record_request)
+    app.add_api_route(
+        "/metrics", metrics_response, methods=["GET"], include_in_schema=False
+    )
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):  # type: ignore
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):  # type: ignore
+    started = conn.info["query_started"].pop()
+    DB_QUERY_SECONDS.observe(time.perf_counter() - started)
+
+
+def _handle_error(exception_context):  # type: ignore
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
+
+
+def _time_checkouts(pool: Pool) -> Pool:
+    """Wrap the checkout of a pool, and of the pools that replace it on dispose
+
+    Args:
+        pool (Pool): Pool to instrument
+
+    Returns:
+        Pool: The same pool
+    """
+
+    do_get = pool._do_get
+    recreate = pool.recreate
+
+    def timed_do_get() -> Any:
+        started = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - started)
+
+    def timed_recreate() -> Pool:
+        return _time_checkouts(recreate())
+
+    pool._do_get = timed_do_get
+    pool.recreate = timed_recreate
+
+    return pool
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time the statements and pool checkouts of a SQLAlchemy engine
+
+    SQLAlchemy has no event before a checkout starts, so the wait is measured by
+    wrapping the pool's own checkout method.
+
+    Args:
+        engine (Engine): Engine to instrument
+    """
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+    _time_checkouts(engine.pool)
+
+
+def start_worker_exporter(port: int = CELERY_METRICS_PORT) -> None:
+    """Serve the metrics of a Celery worker over HTTP
+
+    Called in the worker's main process before the pool is forked. Stale files
+    of a previous run are removed from PROMETHEUS_MULTIPROC_DIR first, so that
+    the exporter only reports the children of this worker.
+
+    Args:
+        port (int): Port to listen on. Defaults to CELERY_METRICS_PORT.
+    """
+
+    if PROMETHEUS_MULTIPROC_DIR:
+        os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+        for path in glob.glob(os.path.join(PROMETHEUS_MULTIPROC_DIR, "*.db")):
+            os.remove(path)
+
+    try:
+        start_http_server(port, registry=get_registry())
+    except OSError:
+        logger.exception(f"[-] Unable to serve worker metrics on port {port}")
+        return
+
+    logger.info(f"[+] Serving worker metrics on port {port}")
@@ -0,0 +1,215 @@
+import argparse
+import logging
+from typing import Callable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+
+from .database import Base, engine
+from .models import SEARCH_VECTOR_EXPRESSION, SYNC_HASH_EXPRESSION, Contact
+
+logger = logging.getLogger(__name__)
+
+
+def column_generation(connection: Connection, table: str, column: str) -> str:
+    """Return how a column is generated according to information_schema
+
+    Args:
+        connection (Connection): Database connection
+        table (str): Table name
+        column (str): Column name
+
+    Returns:
+        str: "ALWAYS" for generated columns, "NEVER" for regular ones and an
+            empty string if the column does not exist
+    """
+
+    result = connection.execute(
+        text(
+            "SELECT is_generated FROM information_schema.columns "
+            "WHERE table_name = :table AND column_name = :column"
+        ),
+        {"table": table, "column": column},
+    ).scalar()
+
+    return result or ""
+
+
+def generated_search_vector(connection: Connection) -> None:
+    """Convert the Python-maintained search_vector into a generated column
+
+    Args:
+        connection (Connection): Database connection
+    """
+
+    table = Contact.__tablename__
+    if column_generation(connection, table, "search_vector") != "NEVER":
+        return
+
+    logger.info("[+] Converting search_vector to a generated column...")
+
+    connection.execute(
+        text(
+            f'ALTER TABLE "{table}" DROP COLUMN search_vector, '
+            f"ADD COLUMN search_vector tsvector "
+            f"GENERATED ALWAYS AS ({SEARCH_VECTOR_EXPRESSION}) STORED"
+        )
+    )
+    connection.execute(
+        text(
+            f'CREATE INDEX IF NOT EXISTS idx_search_vector ON "{table}" '
+            f"USING gin (search_vector)"
+        )
+    )
+
+
+def generated_sync_hash(connection: Connection) -> None:
+    """Add the sync_hash column compared by the Nimbus sync
+
+    Args:
+        connection (Connection): Database connection
+    """
+
+    table = Contact.__tablename__
+    if column_generation(connection, table, "sync_hash"):
+        return
+
+    logger.info("[+] Adding the generated sync_hash column...")
+
+    connection.execute(
+        text(
+            f'ALTER TABLE "{table}" ADD COLUMN sync_hash varchar '
+            f"GENERATED ALWAYS AS ({SYNC_HASH_EXPRESSION}) STORED"
+        )
+    )
+
+
+def index_exists(connection: Connection, name: str) -> bool:
+    """Check whether an index with the given name exists
+
+    Args:
+        connection (Connection): Database connection
+        name (str): Index name
+
+    Returns:
+        bool: True if the index exists
+    """
+
+    result = connection.execute(
+        text("SELECT 1 FROM pg_indexes WHERE indexname = :name"), {"name": name}
+    ).scalar()
+
+    return result is not None
+
+
+def deduplicate_contacts(connection: Connection) -> None:
+    """Remove the duplicates that would block the unique contact indexes
+
+    Earlier versions allowed re-imports to insert the same email again. The
+    oldest contact of every email is kept, and nimbus_id is only kept on the
+    oldest contact linked to a Nimbus record. Contacts are deleted, so this
+    only runs when requested with run_migrations(deduplicate=True).
+
+    Args:
+        connection (Connection): Database connection
+    """
+
+    table = Contact.__tablename__
+
+    if not index_exists(connection, "idx_contact_email_lower"):
+        deleted = connection.execute(
+            text(
+                f'DELETE FROM "{table}" c USING "{table}" d '
+                f"WHERE lower(c.email) = lower(d.email) AND c.id > d.id"
+            )
+        ).rowcount
+        if deleted:
+            logger.warning(f"[!] Removed {deleted} contacts with duplicate emails")
+
+    if not index_exists(connection, "idx_contact_nimbus_id"):
+        unlinked = connection.execute(
+            text(
+                f'UPDATE "{table}" c SET nimbus_id = NULL FROM "{table}" d '
+                f"WHERE c.nimbus_id = d.nimbus_id AND c.id > d.id"
+            )
+        ).rowcount
+        if unlinked:
+            logger.warning(f"[!] Unlinked {unlinked} contacts with duplicate nimbus_id")
+
+
+def missing_indexes(connection: Connection) -> None:
+    """Create the model indexes that existing tables do not have yet
+
+    A unique index that the stored rows still violate is skipped with an error,
+    so the other migrations are kept and the application can start.
+
+    Args:
+        connection (Connection): Database connection
+    """
+
+    connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                with connection.begin_nested():
+                    index.create(bind=connection, checkfirst=True)
+            except IntegrityError as e:
+                logger.error(
+                    f"[!] Index {index.name} was not created: {e.orig}. Remove the "
+                    f"duplicates with python -m api.utils.migrations --deduplicate"
+                )
+
+
+MIGRATIONS: List[Callable[[Connection], None]] = [
+    generated_search_vector,
+    generated_sync_hash,
+]
+
+
+def run_migrations(bind: Engine, deduplicate: bool = False) -> None:
+    """Bring tables created by earlier versions up to date with the models
+
+    Every migration checks the current schema first, so running them again is
+    a no-op. New tables are created by metadata.create_all beforehand. The
+    missing indexes are created last, after the optional deduplication.
+
+    Args:
+        bind (Engine): SQLAlchemy engine
+        deduplicate (bool): Delete duplicate contacts first. Defaults to False.
+    """
+
+    with bind.begin() as connection:
+        for migration in MIGRATIONS:
+            migration(connection)
+
+        if deduplicate:
+            deduplicate_contacts(connection)
+
+        missing_indexes(connection)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command line entry point for the schema migrations
+
+    Args:
+        argv (Optional[List[str]]): Command line arguments. Defaults to sys.argv.
+    """
+
+    parser = argparse.ArgumentParser(description="Migrate the contact tables")
+    parser.add_argument(
+        "--deduplicate",
+        action="store_true",
+        help="delete the duplicate contacts blocking the unique indexes",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine, deduplicate=args.deduplicate)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,54 @@
-from sqlalchemy import Column, Index, Integer, String, event
-from sqlalchemy.dialects.postgresql import TSVECTOR
+import hashlib
+from typing import Mapping, Optional
+
+from sqlalchemy import DDL, Column, Computed, DateTime, Index, Integer, String, event
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.orm import Session, object_session
 from sqlalchemy.sql import func
 
+from .cache import search_cache
 from .database import Base
 
+SEARCH_CONFIG = "english"
+
+# Names weigh the most in ts_rank_cd, then the email, then the description
+SEARCH_VECTOR_EXPRESSION = " || ".join(
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({column}, '')), '{weight}')"
+    for column, weight in (
+        ("first_name", "A"),
+        ("last_name", "A"),
+        ("email", "B"),
+        ("description", "C"),
+    )
+)
+
+# Columns written by the Nimbus sync. Their hash is kept on every row, so the
+# sync can tell whether a remote record changes anything before writing it.
+SYNC_HASH_COLUMNS = ("nimbus_id", "first_name", "last_name", "email")
+SYNC_HASH_SEPARATOR = "\x1f"
+SYNC_HASH_EXPRESSION = (
+    "md5("
+    + " || chr(31) || ".join(f"coalesce({column}, '')" for column in SYNC_HASH_COLUMNS)
+    + ")"
+)
+
+
+def sync_hash(values: Mapping[str, Optional[str]]) -> str:
+    """Hash synced column values the same way as the sync_hash column
+
+    Args:
+        values (Mapping[str, Optional[str]]): Values by column name
+
+    Returns:
+        str: Hex MD5 digest
+    """
+
+    content = SYNC_HASH_SEPARATOR.join(
+        values.get(column) or "" for column in SYNC_HASH_COLUMNS
+    )
+
+    return hashlib.md5(content.encode()).hexdigest()
+
 
 class Contact(Base):
     __tablename__ = "Contact"
@@ -14,18 +59,93 @@ class Contact(Base):
     last_name = Column(String)
     email = Column(String)
     description = Column(String)
-    search_vector = Column(TSVECTOR)
+    search_vector = Column(TSVECTOR, Computed(SEARCH_VECTOR_EXPRESSION, persisted=True))
+    sync_hash = Column(String, Computed(SYNC_HASH_EXPRESSION, persisted=True))
 
     __table_args__ = (
         Index("idx_search_vector", search_vector, postgresql_using="gin"),
+        # Exact lookups and upserts match emails case-insensitively
+        Index("idx_contact_email_lower", func.lower(email), unique=True),
+        Index(
+            "idx_contact_nimbus_id",
+            nimbus_id,
+            unique=True,
+            postgresql_where=nimbus_id.isnot(None),
+        ),
+        Index(
+            "idx_contact_first_name_trgm",
+            first_name,
+            postgresql_using="gin",
+            postgresql_ops={"first_name": "gin_trgm_ops"},
+        ),
+        Index(
+            "idx_contact_last_name_trgm",
+            last_name,
+            postgresql_using="gin",
+            postgresql_ops={"last_name": "gin_trgm_ops"},
+        ),
+        Index(
+            "idx_contact_email_trgm",
+            email,
+            postgresql_using="gin",
+            postgresql_ops={"email": "gin_trgm_ops"},
+        ),
     )
 
 
-def update_search_vector(mapper, connection, target):  # type: ignore
-    values = [target.first_name, target.last_name, target.email, target.description]
-    filtered_values = [item for item in values if item]
-    target.search_vector = func.to_tsvector("english", " ".join(filtered_values))
+# The trigram indexes need pg_trgm before the table and its indexes are created
+event.listen(
+    Contact.__table__, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+)
+
+
+class JobState(Base):
+    """Checkpoint and progress of a long-running background job"""
+
+    __tablename__ = "JobState"
+
+    name = Column(String, primary_key=True)
+    state = Column(JSONB, nullable=False, default=dict)
+    updated_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+
+
+def flag_search_cache_stale(session: Session) -> None:
+    """Drop cached search pages once the session commits.
+
+    Used directly by Core statements that bypass the ORM flush hooks below.
+    """
+
+    session.info["search_cache_stale"] = True
+
+
+def mark_search_cache_stale(mapper, connection, target):  # type: ignore
+    """Flag the owning session so cached search pages are dropped on commit.
+
+    Invalidating here directly would let a concurrent search re-cache the
+    pre-commit rows, so the actual invalidation waits for the commit.
+    """
+
+    session = object_session(target)
+    if session is not None:
+        flag_search_cache_stale(session)
+
+
+event.listen(Contact, "before_insert", mark_search_cache_stale)
+event.listen(Contact, "before_update", mark_search_cache_stale)
+event.listen(Contact, "before_delete", mark_search_cache_stale)
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_search_cache(session):  # type: ignore
+    if session.info.pop("search_cache_stale", False):
+        search_cache.invalidate()
 
 
-event.listen(Contact, "before_insert", update_search_vector)
-event.listen(Contact, "before_update", update_search_vector)
+@event.listens_for(Session, "after_rollback")
+def discard_search_cache_flag(session):  # type: ignore
+    session.info.pop("search_cache_stale", None)
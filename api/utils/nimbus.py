@@ -1,18 +1,58 @@
+import asyncio
+import hashlib
 import json
 import logging
 import os
-from typing import Any, Dict, List, Optional
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
 from urllib.parse import urlencode
 
+import httpx
+import redis
 import requests
 from pydantic import BaseModel
+from redis import asyncio as aioredis
 from requests.adapters import HTTPAdapter, Retry
 
+from .cache import REDIS_RETRY_AFTER_SECONDS, REDIS_TIMEOUT_SECONDS, REDIS_URL
+from .metrics import NIMBUS_CACHE, NIMBUS_REQUEST_SECONDS, NIMBUS_RETRIES
+from .throttle import CircuitBreaker, TokenBucket
+
 logger = logging.getLogger(__name__)
 
 MAX_RETRIES = 3
 TIMEOUT_SECONDS = 15
-BASE_URL = "https://api.nimble.com/api/v1/contacts"
+BASE_URL = os.getenv("NIMBUS_BASE_URL", "https://api.nimble.com/api/v1/contacts")
+DEFAULT_FIELDS = "first name,last name,email,description"
+
+MAX_CONCURRENCY = int(os.getenv("NIMBUS_MAX_CONCURRENCY", "20"))
+BACKOFF_FACTOR = 1.0
+MAX_BACKOFF_SECONDS = 60.0
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+BATCH_SIZE = int(os.getenv("NIMBUS_BATCH_SIZE", "50"))
+
+NIMBUS_CACHE_REDIS_URL = os.getenv("NIMBUS_CACHE_REDIS_URL", REDIS_URL)
+# Responses younger than MAX_AGE are served without a request, older ones are
+# revalidated until they expire after TTL
+NIMBUS_CACHE_MAX_AGE = int(os.getenv("NIMBUS_CACHE_MAX_AGE", "300"))
+NIMBUS_CACHE_TTL = int(os.getenv("NIMBUS_CACHE_TTL", str(7 * 24 * 3600)))
+NIMBUS_CACHE_NEGATIVE_TTL = int(os.getenv("NIMBUS_CACHE_NEGATIVE_TTL", "3600"))
+
+T = TypeVar("T")
 
 
 class NimbusContact(BaseModel):
@@ -25,21 +65,302 @@ class NimbusContactsResponse(BaseModel):
     meta: Optional[Dict[str, Any]]
 
 
-class NimbusAPIClient:
-    """Nimbus API Client"""
+def batched(items: Sequence[T], size: int = BATCH_SIZE) -> Iterator[Sequence[T]]:
+    """Split a sequence into consecutive batches
 
-    def __init__(self, session: requests.Session) -> None:
-        retry_strategy = Retry(
-            total=MAX_RETRIES,
-            backoff_factor=1,
-        )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        self.session = session
-        self.session.mount("https://", adapter)
+    Args:
+        items (Sequence[T]): Items to split
+        size (int): Maximum batch size. Defaults to BATCH_SIZE.
+
+    Yields:
+        Iterator[Sequence[T]]: Batches of items
+    """
+
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def field_values(contact: NimbusContact, name: str) -> List[str]:
+    """Return the values of a Nimbus contact field
+
+    Nimbus returns field values either as plain strings or as objects with a
+    "value" key.
+
+    Args:
+        contact (NimbusContact): Nimbus contact
+        name (str): Field name, e.g. "first name"
+
+    Returns:
+        List[str]: Field values, empty if the field is missing
+    """
+
+    values = contact.fields.get(name) or []
+    if not isinstance(values, list):
+        values = [values]
+
+    return [v["value"] if isinstance(v, dict) else v for v in values if v]
+
+
+def field_value(contact: NimbusContact, name: str) -> Optional[str]:
+    """Return the first value of a Nimbus contact field
+
+    Args:
+        contact (NimbusContact): Nimbus contact
+        name (str): Field name, e.g. "first name"
+
+    Returns:
+        Optional[str]: First value, or None if the field is missing
+    """
+
+    values = field_values(contact, name)
+
+    return values[0] if values else None
+
+
+class NimbusResponseCache:
+    """Redis cache of Nimbus responses, revalidated with conditional requests
+
+    Responses are keyed by request URL and stored with their ETag and
+    Last-Modified headers. A fresh entry (younger than max_age) is served
+    without a request. A stale one is sent back to Nimbus as If-None-Match /
+    If-Modified-Since, so an unchanged record costs a 304 without a body.
+
+    Emails without a Nimbus match, and empty responses, are kept for the
+    shorter negative_ttl and are not revalidated. A Redis outage only disables
+    the cache.
+    """
+
+    key_prefix = "nimbus-cache"
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = NIMBUS_CACHE_REDIS_URL,
+        max_age: int = NIMBUS_CACHE_MAX_AGE,
+        ttl: int = NIMBUS_CACHE_TTL,
+        negative_ttl: int = NIMBUS_CACHE_NEGATIVE_TTL,
+    ) -> None:
+        self.redis_url = redis_url
+        self.max_age = max_age
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._aredis: Optional[aioredis.Redis] = None
+        self._redis_down_until = 0.0
+
+    def key(self, url: str) -> str:
+        return f"{self.key_prefix}:{hashlib.sha1(url.encode()).hexdigest()}"
+
+    def miss_key(self, email: str) -> str:
+        return f"{self.key_prefix}:miss:{email.lower()}"
+
+    def _redis_available(self) -> bool:
+        return bool(self.redis_url) and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, e: Exception) -> None:
+        logger.warning(f"[!] Nimbus cache Redis is unavailable: {e}")
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_AFTER_SECONDS
+
+    def _get_aredis(self) -> aioredis.Redis:
+        if self._aredis is None:
+            assert self.redis_url is not None
+            self._aredis = aioredis.Redis.from_url(
+                self.redis_url, socket_timeout=REDIS_TIMEOUT_SECONDS
+            )
+        return self._aredis
+
+    async def aclose(self) -> None:
+        """Close the asyncio Redis client, which is bound to the running loop"""
+
+        if self._aredis is not None:
+            await self._aredis.close()
+            self._aredis = None
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        """Check whether an entry can be served without asking Nimbus
+
+        Args:
+            entry (Dict[str, Any]): Cached entry
+
+        Returns:
+            bool: True for negative entries and entries younger than max_age
+        """
+
+        if entry["negative"]:
+            return True
+
+        return time.time() - entry["stored_at"] < self.max_age
+
+    def conditional_headers(self, entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Build the revalidation headers of a cached entry
+
+        Args:
+            entry (Optional[Dict[str, Any]]): Cached entry
+
+        Returns:
+            Dict[str, str]: If-None-Match and If-Modified-Since, when known
+        """
+
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        return headers
+
+    def _encode(
+        self,
+        data: Dict[str, Any],
+        headers: Any,
+        previous: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[str, int]:
+        previous = previous or {}
+        negative = not data.get("resources")
+        entry = {
+            "data": data,
+            "etag": headers.get("ETag") or previous.get("etag"),
+            "last_modified": headers.get("Last-Modified")
+            or previous.get("last_modified"),
+            "stored_at": time.time(),
+            "negative": negative,
+        }
+
+        return json.dumps(entry), self.negative_ttl if negative else self.ttl
+
+    async def aget(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry of a URL
+
+        Args:
+            url (str): Request URL
+
+        Returns:
+            Optional[Dict[str, Any]]: Entry with data, validators and age, or None
+        """
+
+        if not self._redis_available():
+            return None
+
+        try:
+            raw = await self._get_aredis().get(self.key(url))
+        except redis.RedisError as e:
+            self._redis_failed(e)
+            return None
+
+        return json.loads(raw) if raw else None
+
+    async def aset(
+        self,
+        url: str,
+        data: Dict[str, Any],
+        headers: Any,
+        previous: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Store a response, or refresh an entry after a 304
+
+        Args:
+            url (str): Request URL
+            data (Dict[str, Any]): Response body
+            headers (Any): Response headers
+            previous (Optional[Dict[str, Any]]): Entry being revalidated. Defaults to None.
+        """
+
+        if not self._redis_available():
+            return
+
+        value, ttl = self._encode(data, headers, previous)
+        try:
+            await self._get_aredis().set(self.key(url), value, ex=ttl)
+        except redis.RedisError as e:
+            self._redis_failed(e)
+
+    async def amissing_emails(self, emails: Sequence[str]) -> Set[str]:
+        """Return the emails recently found to have no Nimbus match
+
+        Args:
+            emails (Sequence[str]): Emails to check
+
+        Returns:
+            Set[str]: Lower cased emails with a cached miss
+        """
+
+        if not emails or not self._redis_available():
+            return set()
+
+        try:
+            flags = await self._get_aredis().mget([self.miss_key(e) for e in emails])
+        except redis.RedisError as e:
+            self._redis_failed(e)
+            return set()
+
+        return {email.lower() for email, flag in zip(emails, flags) if flag}
+
+    async def amark_missing(self, emails: Iterable[str]) -> None:
+        """Remember emails without a Nimbus match for negative_ttl seconds
+
+        Args:
+            emails (Iterable[str]): Emails without a match
+        """
+
+        keys = [self.miss_key(email) for email in emails]
+        if not keys or not self._redis_available():
+            return
+
+        try:
+            pipeline = self._get_aredis().pipeline(transaction=False)
+            for key in keys:
+                pipeline.set(key, 1, ex=self.negative_ttl)
+            await pipeline.execute()
+        except redis.RedisError as e:
+            self._redis_failed(e)
+
+
+class BaseNimbusAPIClient:
+    """Request building shared by the Nimbus API clients"""
+
+    def __init__(
+        self,
+        cache: Optional[NimbusResponseCache] = None,
+        limiter: Optional[TokenBucket] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
         self.headers = {
             "Authorization": f"Bearer {os.getenv('NIMBUS_API_KEY')}",
             "Content-Type": "application/json",
         }
+        self.cache = cache
+        self.limiter = limiter
+        self.breaker = breaker
+
+    def _circuit_open(self, url: str) -> bool:
+        """Check whether the circuit breaker rejects a request
+
+        Args:
+            url (str): Request URL
+
+        Returns:
+            bool: True if the request must not be sent
+        """
+
+        if self.breaker is None or self.breaker.allow():
+            return False
+
+        logger.warning(f"[!] Nimbus circuit breaker is open, skipping {url}")
+        return True
+
+    def _record_result(self, failed: bool) -> None:
+        """Report the result of a request to the circuit breaker, if any
+
+        Args:
+            failed (bool): Whether Nimbus failed, i.e. a transport error, a 429
+                or a server error. Other client errors count as successes.
+        """
+
+        if self.breaker is None:
+            return
+
+        if failed:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
 
     def _dict_to_query(self, query: dict) -> str:
         """Generates a query string from a dictionary ignore any keys with a value of None
@@ -53,48 +374,215 @@ class NimbusAPIClient:
 
         return urlencode({k: v for k, v in query.items() if v is not None})
 
-    def list_contacts(
+    def _list_contacts_url(
         self,
-        fields: Optional[str] = "first name,last name,email,description",
-        record_type: Optional[str] = "person",
-        page: Optional[int] = 1,
-        query: Optional[dict] = None,
-    ) -> Optional[NimbusContactsResponse]:
-        """Performs a GET request to list contacts in Nimbus
+        fields: Optional[str],
+        record_type: Optional[str],
+        page: Optional[int],
+        query: Optional[dict],
+    ) -> str:
+        """Build the URL to list contacts
 
         Args:
-            query (Optional[dict]): Query parameters to filter the results. Defaults to None.
-            fields (Optional[str]): Fields to return in the response. Defaults to "first_name,email,description".
-            record_type (Optional[str]): Record type to filter the results. Defaults to "person".
+            fields (Optional[str]): Fields to return in the response
+            record_type (Optional[str]): Record type to filter the results
+            page (Optional[int]): Page number
+            query (Optional[dict]): Query parameters to filter the results
 
         Returns:
-            Optional[dict]: JSON response as a dictionary, or None if the request failed
+            str: Request URL
         """
 
         query_params = {
             "fields": fields,
             "record_type": record_type,
-            "query": json.dumps(query) if query else None,
+            "query": json.dumps(query, sort_keys=True) if query else None,
             "page": page,
         }
 
-        (f"Query params: {query_params}")
+        return BASE_URL + f"?{self._dict_to_query(query_params)}"
+
+    def _contact_url(self, id: Union[int, str]) -> str:
+        """Build the URL to get a contact
+
+        Args:
+            id (Union[int, str]): Contact ID, or comma separated IDs.
+
+        Returns:
+            str: Request URL
+        """
+
+        return BASE_URL + f"/{id}"
+
+    def _emails_query(self, emails: Iterable[str]) -> Dict[str, Any]:
+        """Build one compound query matching any of the given emails
+
+        Args:
+            emails (Iterable[str]): Emails to look up
+
+        Returns:
+            Dict[str, Any]: Nimbus query
+        """
+
+        # Normalized, so the same batch always builds the same cache key
+        clauses: List[Dict[str, Any]] = [
+            {"email": {"is": email}} for email in sorted(emails)
+        ]
+
+        return clauses[0] if len(clauses) == 1 else {"or": clauses}
+
+    def updated_since_query(self, since: datetime) -> dict:
+        """Build a query matching records modified since a point in time
+
+        Args:
+            since (datetime): Lower bound of the modification time
+
+        Returns:
+            dict: Nimbus query
+        """
+
+        return {"updated": {"range": {"start_date": since.isoformat()}}}
+
+    def has_next_page(self, response: NimbusContactsResponse, page: int) -> bool:
+        """Check whether a paginated list response has more pages
+
+        Args:
+            response (NimbusContactsResponse): Response for the current page
+            page (int): Current page number
+
+        Returns:
+            bool: True if another page should be requested
+        """
+
+        pages = (response.meta or {}).get("pages") or 1
+
+        return bool(response.resources) and page < pages
+
+    def _unresolved(
+        self, emails: Sequence[str], matches: Dict[str, NimbusContact]
+    ) -> List[str]:
+        """Return the requested emails (lower cased) that had no match
+
+        Args:
+            emails (Sequence[str]): Requested emails
+            matches (Dict[str, NimbusContact]): Matches by lower cased email
+
+        Returns:
+            List[str]: Emails without a match
+        """
+
+        return [email.lower() for email in emails if email.lower() not in matches]
+
+    def _map_by_email(
+        self, contacts: List[NimbusContact], emails: Iterable[str]
+    ) -> Dict[str, NimbusContact]:
+        """Map requested emails (lower cased) to the Nimbus contacts holding them
+
+        Args:
+            contacts (List[NimbusContact]): Nimbus contacts returned by a batch query
+            emails (Iterable[str]): Requested emails
+
+        Returns:
+            Dict[str, NimbusContact]: Matched contacts by lower cased email
+        """
+
+        wanted = {email.lower() for email in emails}
+        matches: Dict[str, NimbusContact] = {}
+
+        for contact in contacts:
+            for email in field_values(contact, "email"):
+                key = email.lower()
+                if key in wanted and key not in matches:
+                    matches[key] = contact
+
+        return matches
+
+
+class CountingRetry(Retry):
+    """urllib3 retry strategy that records every retry in NIMBUS_RETRIES"""
 
-        url = BASE_URL + f"?{self._dict_to_query(query_params)}"
+    def increment(  # type: ignore
+        self, method=None, url=None, response=None, error=None, *args, **kwargs
+    ):
+        reason = str(response.status) if response is not None else "transport"
+        NIMBUS_RETRIES.labels("sync", reason).inc()
+
+        return super().increment(method, url, response, error, *args, **kwargs)
+
+
+class NimbusAPIClient(BaseNimbusAPIClient):
+    """Nimbus API Client"""
+
+    def __init__(
+        self,
+        session: requests.Session,
+    ) -> None:
+        super().__init__()
+        retry_strategy = CountingRetry(
+            total=MAX_RETRIES,
+            backoff_factor=1,
+        )
+        adapter = HTTPAdapter(max_retries=retry_strategy)
+        self.session = session
+        self.session.mount("https://", adapter)
+
+    def _get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Perform a GET request
+
+        Args:
+            url (str): Request URL
+
+        Returns:
+            Optional[Dict[str, Any]]: JSON response, or None if the request failed
+        """
+
+        started = time.perf_counter()
+        outcome = "error"
 
         try:
             response = self.session.get(
                 url, headers=self.headers, timeout=TIMEOUT_SECONDS
             )
             response.raise_for_status()
+            outcome = "success"
         except requests.HTTPError as e:
+            outcome = "http_error"
             logger.warning(f"[!] Request for {url} failed with HTTP error: {e}")
             return None
         except Exception as e:
             logger.warning(f"[!] An error occurred for {url}: {str(e)}")
             return None
+        finally:
+            NIMBUS_REQUEST_SECONDS.labels("sync", outcome).observe(
+                time.perf_counter() - started
+            )
+
+        return response.json()
+
+    def list_contacts(
+        self,
+        fields: Optional[str] = DEFAULT_FIELDS,
+        record_type: Optional[str] = "person",
+        page: Optional[int] = 1,
+        query: Optional[dict] = None,
+    ) -> Optional[NimbusContactsResponse]:
+        """Performs a GET request to list contacts in Nimbus
+
+        Args:
+            query (Optional[dict]): Query parameters to filter the results. Defaults to None.
+            fields (Optional[str]): Fields to return in the response. Defaults to "first_name,email,description".
+            record_type (Optional[str]): Record type to filter the results. Defaults to "person".
+
+        Returns:
+            Optional[dict]: JSON response as a dictionary, or None if the request failed
+        """
+
+        data = self._get(self._list_contacts_url(fields, record_type, page, query))
+
+        if data is None:
+            return None
 
-        return NimbusContactsResponse(**response.json())
+        return NimbusContactsResponse(**data)
 
     def get_contact(self, id: int) -> Optional[NimbusContactsResponse]:
         """Performs a GET request to get contact in Nimbus
@@ -106,23 +594,358 @@ class NimbusAPIClient:
             Optional[dict]: JSON response as a dictionary, or None if the request failed
         """
 
-        url = BASE_URL + f"/{id}"
+        data = self._get(self._contact_url(id))
+
+        if data is None:
+            return None
+
+        response = NimbusContactsResponse(**data)
+
+        if len(response.resources) == 0:
+            return None
+
+        return response
+
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Parse the Retry-After header of a response
+
+    Args:
+        response (httpx.Response): HTTP response
+
+    Returns:
+        Optional[float]: Seconds to wait, or None if the header is missing or invalid
+    """
+
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class AsyncNimbusAPIClient(BaseNimbusAPIClient):
+    """Asynchronous Nimbus API Client
+
+    All requests share one pooled httpx connection (HTTP/2 when available) and a
+    semaphore bounds how many of them are in flight, so thousands of lookups can
+    be awaited concurrently without a thread per request.
+    """
+
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient] = None,
+        max_concurrency: int = MAX_CONCURRENCY,
+        max_retries: int = MAX_RETRIES,
+        backoff_factor: float = BACKOFF_FACTOR,
+        cache: Optional[NimbusResponseCache] = None,
+        limiter: Optional[TokenBucket] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        super().__init__(cache, limiter, breaker)
+        self.client = client or httpx.AsyncClient(
+            http2=True,
+            timeout=TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency,
+            ),
+        )
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+
+    async def __aenter__(self) -> "AsyncNimbusAPIClient":
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the underlying connection pool"""
+
+        await self.client.aclose()
+        if self.cache:
+            await self.cache.aclose()
+        if self.limiter:
+            await self.limiter.aclose()
+
+    def _backoff(self, attempt: int) -> float:
+        return min(MAX_BACKOFF_SECONDS, self.backoff_factor * (2**attempt))
+
+    async def _send(
+        self, url: str, headers: Dict[str, str]
+    ) -> Optional[httpx.Response]:
+        """Perform a GET request, retrying transport errors and retryable statuses
+
+        The semaphore is only held while a request is in flight, not while
+        backing off. Retry-After is honoured when the server sends it. The
+        recorded duration covers every attempt and the back-off between them.
+
+        Every attempt takes a token from the rate limiter and reports to the
+        circuit breaker. Once the breaker is open, the request gives up without
+        waiting for its remaining retries.
+
+        Args:
+            url (str): Request URL
+            headers (Dict[str, str]): Headers added to the client headers
+
+        Returns:
+            Optional[httpx.Response]: Successful or 304 response, or None if the
+                request failed
+        """
+
+        started = time.perf_counter()
+        outcome = "error"
+        headers = {**self.headers, **headers}
 
         try:
-            response = self.session.get(
-                url, headers=self.headers, timeout=TIMEOUT_SECONDS
+            for attempt in range(self.max_retries + 1):
+                if self._circuit_open(url):
+                    outcome = "circuit_open"
+                    return None
+
+                if self.limiter:
+                    await self.limiter.aacquire()
+
+                try:
+                    async with self.semaphore:
+                        response = await self.client.get(url, headers=headers)
+                except httpx.TransportError as e:
+                    logger.warning(f"[!] An error occurred for {url}: {str(e)}")
+                    reason = "transport"
+                    delay = self._backoff(attempt)
+                else:
+                    retryable = response.status_code in RETRY_STATUS_CODES
+                    if not retryable or attempt == self.max_retries:
+                        self._record_result(failed=retryable)
+
+                    if response.status_code == 304:
+                        outcome = "not_modified"
+                        return response
+
+                    if not retryable or attempt == self.max_retries:
+                        try:
+                            response.raise_for_status()
+                        except httpx.HTTPStatusError as e:
+                            outcome = "http_error"
+                            logger.warning(
+                                f"[!] Request for {url} failed with HTTP error: {e}"
+                            )
+                            return None
+
+                        outcome = "success"
+                        return response
+
+                    reason = str(response.status_code)
+                    delay = retry_after_seconds(response) or self._backoff(attempt)
+                    delay = min(delay, MAX_BACKOFF_SECONDS)
+
+                self._record_result(failed=True)
+                if self.breaker and self.breaker.is_open:
+                    outcome = "circuit_open"
+                    logger.warning(
+                        f"[!] Nimbus circuit breaker opened, giving up {url}"
+                    )
+                    return None
+
+                if attempt < self.max_retries:
+                    NIMBUS_RETRIES.labels("async", reason).inc()
+                    await asyncio.sleep(delay)
+
+            logger.warning(
+                f"[!] Request for {url} failed after {self.max_retries} retries"
             )
-            response.raise_for_status()
-        except requests.HTTPError as e:
-            logger.warning(f"[!] Request for {url} failed with HTTP error: {e}")
-            return None
-        except Exception as e:
-            logger.warning(f"[!] An error occurred for {url}: {str(e)}")
             return None
+        finally:
+            NIMBUS_REQUEST_SECONDS.labels("async", outcome).observe(
+                time.perf_counter() - started
+            )
+
+    async def _get(self, url: str, cached: bool = False) -> Optional[Dict[str, Any]]:
+        """Perform a GET request and decode the JSON response
+
+        Args:
+            url (str): Request URL
+            cached (bool): Go through the response cache, if the client has one.
+                Defaults to False.
+
+        Returns:
+            Optional[Dict[str, Any]]: JSON response, or None if the request failed
+        """
 
-        data = NimbusContactsResponse(**response.json())
+        cache = self.cache if cached else None
+        entry = await cache.aget(url) if cache else None
+        if cache and entry and cache.is_fresh(entry):
+            NIMBUS_CACHE.labels("hit").inc()
+            return entry["data"]
 
-        if len(data.resources) == 0:
+        response = await self._send(
+            url, cache.conditional_headers(entry) if cache else {}
+        )
+        if response is None:
             return None
 
+        if cache and entry and response.status_code == 304:
+            NIMBUS_CACHE.labels("revalidated").inc()
+            await cache.aset(url, entry["data"], response.headers, previous=entry)
+            return entry["data"]
+
+        data = response.json()
+        if cache:
+            NIMBUS_CACHE.labels("miss").inc()
+            await cache.aset(url, data, response.headers)
+
         return data
+
+    async def list_contacts(
+        self,
+        fields: Optional[str] = DEFAULT_FIELDS,
+        record_type: Optional[str] = "person",
+        page: Optional[int] = 1,
+        query: Optional[dict] = None,
+        cached: bool = False,
+    ) -> Optional[NimbusContactsResponse]:
+        """Performs a GET request to list contacts in Nimbus
+
+        Args:
+            query (Optional[dict]): Query parameters to filter the results. Defaults to None.
+            fields (Optional[str]): Fields to return in the response. Defaults to DEFAULT_FIELDS.
+            record_type (Optional[str]): Record type to filter the results. Defaults to "person".
+            page (Optional[int]): Page number. Defaults to 1.
+            cached (bool): Use the response cache. Defaults to False.
+
+        Returns:
+            Optional[NimbusContactsResponse]: Parsed response, or None if the request failed
+        """
+
+        data = await self._get(
+            self._list_contacts_url(fields, record_type, page, query), cached=cached
+        )
+
+        if data is None:
+            return None
+
+        return NimbusContactsResponse(**data)
+
+    async def get_contact(self, id: int) -> Optional[NimbusContactsResponse]:
+        """Performs a GET request to get contact in Nimbus
+
+        Args:
+            id (int): Contact ID.
+
+        Returns:
+            Optional[NimbusContactsResponse]: Parsed response, or None if the request failed
+        """
+
+        data = await self._get(self._contact_url(id), cached=True)
+
+        if data is None:
+            return None
+
+        response = NimbusContactsResponse(**data)
+
+        if len(response.resources) == 0:
+            return None
+
+        return response
+
+    async def list_all_contacts(
+        self,
+        query: dict,
+        fields: Optional[str] = DEFAULT_FIELDS,
+        cached: bool = False,
+    ) -> Optional[List[NimbusContact]]:
+        """Follow the pagination of a list query and collect every page
+
+        Args:
+            query (dict): Query parameters to filter the results
+            fields (Optional[str]): Fields to return in the response. Defaults to DEFAULT_FIELDS.
+            cached (bool): Use the response cache. Defaults to False.
+
+        Returns:
+            Optional[List[NimbusContact]]: Contacts from all pages, or None if a request failed
+        """
+
+        contacts: List[NimbusContact] = []
+        page = 1
+
+        while True:
+            response = await self.list_contacts(
+                fields=fields, page=page, query=query, cached=cached
+            )
+            if response is None:
+                return None
+
+            contacts.extend(response.resources)
+            if not self.has_next_page(response, page):
+                return contacts
+
+            page += 1
+
+    async def resolve_emails(
+        self, emails: Sequence[str]
+    ) -> Optional[Dict[str, NimbusContact]]:
+        """Resolve a batch of emails with one compound query
+
+        Emails recently found to have no match are not asked for again.
+
+        Args:
+            emails (Sequence[str]): Emails to look up, at most BATCH_SIZE
+
+        Returns:
+            Optional[Dict[str, NimbusContact]]: Matches by lower cased email, or None if the request failed
+        """
+
+        missing = await self.cache.amissing_emails(emails) if self.cache else set()
+        pending = [email for email in emails if email.lower() not in missing]
+        if missing:
+            NIMBUS_CACHE.labels("negative_hit").inc(len(emails) - len(pending))
+
+        if not pending:
+            return {}
+
+        contacts = await self.list_all_contacts(
+            query=self._emails_query(pending), cached=True
+        )
+        if contacts is None:
+            return None
+
+        matches = self._map_by_email(contacts, pending)
+        if self.cache:
+            await self.cache.amark_missing(self._unresolved(pending, matches))
+
+        return matches
+
+    async def resolve_ids(
+        self, ids: Sequence[str]
+    ) -> Optional[Dict[str, NimbusContact]]:
+        """Resolve a batch of Nimbus ids with one request
+
+        Args:
+            ids (Sequence[str]): Nimbus ids to look up, at most BATCH_SIZE
+
+        Returns:
+            Optional[Dict[str, NimbusContact]]: Matches by id, or None if the request failed
+        """
+
+        if not ids:
+            return {}
+
+        data = await self._get(self._contact_url(",".join(ids)), cached=True)
+        if data is None:
+            return None
+
+        response = NimbusContactsResponse(**data)
+
+        return {contact.id: contact for contact in response.resources}
@@ -1,4 +1,5 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel
 
@@ -14,6 +15,22 @@ class Contact(BaseModel):
         from_attributes = True
 
 
+class ContactResult(Contact):
+    id: int
+
+
+class Suggestion(BaseModel):
+    id: int
+    first_name: Optional[str]
+    last_name: Optional[str]
+    email: Optional[str]
+
+
+class SearchResults(BaseModel):
+    results: List[ContactResult]
+    next_cursor: Optional[str] = None
+
+
 class TaskStatus(BaseModel):
     task_id: str
     task_status: str
@@ -22,4 +39,14 @@ class TaskStatus(BaseModel):
 class TaskResult(BaseModel):
     state: str
     status: Optional[str] = None
-    result: Optional[List[Contact]] = None
+    result: Optional[List[ContactResult]] = None
+    next_cursor: Optional[str] = None
+
+
+class JobState(BaseModel):
+    name: str
+    state: Dict[str, Any]
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
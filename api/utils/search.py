@@ -1,31 +1,496 @@
-from typing import List
+import base64
+import binascii
+import functools
+import json
+import math
+import os
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
 
-from sqlalchemy import func
+import databases
+from sqlalchemy import (
+    Float,
+    Integer,
+    and_,
+    bindparam,
+    cast,
+    func,
+    literal_column,
+    or_,
+    select,
+)
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql import Select
 
 from . import database, models
+from .cache import LRUCache, normalize_query, search_cache
+from .metrics import SEARCH_SECONDS
 
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
 
-def full_text_search(session: database.SessionLocal, text: str) -> List[models.Contact]:
-    """Execute full text search query
+SUGGEST_LIMIT = 10
+MAX_SUGGEST_LIMIT = 20
+# Shorter prefixes only yield the padded trigrams most names share, so the
+# GIN indexes would hardly narrow the scan
+MIN_SUGGEST_LENGTH = 3
+SUGGEST_CACHE_SIZE = int(os.getenv("SUGGEST_CACHE_SIZE", "4096"))
+SUGGEST_CACHE_TTL = float(os.getenv("SUGGEST_CACHE_TTL", "10"))
+
+# Bounds of the integer id and of the real rank bound into the keyset predicate
+MAX_CURSOR_ID = 2**31 - 1
+MAX_CURSOR_RANK = 3.4028234663852886e38
+
+LIKE_ESCAPE = "/"
+
+suggest_cache = LRUCache(maxsize=SUGGEST_CACHE_SIZE, ttl=SUGGEST_CACHE_TTL)
+
+CONTACT_COLUMNS = (
+    models.Contact.id,
+    models.Contact.nimbus_id,
+    models.Contact.first_name,
+    models.Contact.last_name,
+    models.Contact.email,
+    models.Contact.description,
+)
+CONTACT_KEYS = tuple(column.key for column in CONTACT_COLUMNS)
+
+# The config the stored search_vector is built with, so query terms are stemmed
+# the same way as the indexed lexemes
+TS_CONFIG = literal_column(f"'{models.SEARCH_CONFIG}'::regconfig")
+
+# Field-scoped terms such as email:foo or name:"van der", matched with ILIKE on
+# the columns served by the pg_trgm GIN indexes
+FIELD_COLUMNS = {
+    "first_name": (models.Contact.first_name,),
+    "last_name": (models.Contact.last_name,),
+    "name": (models.Contact.first_name, models.Contact.last_name),
+    "email": (models.Contact.email,),
+}
+FIELD_ALIASES = {"first": "first_name", "last": "last_name"}
+# Query shapes whose statements are kept, bounded since shapes come from user input
+SEARCH_SHAPES = 256
+FIELD_TERM = re.compile(
+    r'(?<!\S)(?P<field>[a-z_]+):(?:"(?P<quoted>[^"]*)"|(?P<value>\S+))', re.IGNORECASE
+)
+
+
+class SearchQuery(NamedTuple):
+    """Search text split into full text terms and field-scoped filters"""
+
+    text: str
+    filters: Tuple[Tuple[str, str], ...] = ()
+
+    @property
+    def has_text(self) -> bool:
+        # A query without any filter always goes through the full text index
+        return bool(self.text) or not self.filters
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        return tuple(field for field, _ in self.filters)
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def encode_cursor(rank: float, id: int) -> str:
+    """Encode the keyset position of a row into an opaque cursor
+
+    Args:
+        rank (float): Rank of the last row on the page
+        id (int): Id of the last row on the page
+
+    Returns:
+        str: URL safe cursor
+    """
+
+    payload = json.dumps([rank, id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    """Decode an opaque cursor back into its keyset position
+
+    Args:
+        cursor (str): Cursor returned by a previous page
+
+    Raises:
+        InvalidCursor: If the cursor is malformed or out of the column ranges
+
+    Returns:
+        Tuple[float, int]: Rank and id of the last row of the previous page
+    """
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        rank, id = json.loads(base64.urlsafe_b64decode(padded))
+        rank, id = float(rank), int(id)
+    except (binascii.Error, TypeError, ValueError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+    if not math.isfinite(rank) or abs(rank) > MAX_CURSOR_RANK:
+        raise InvalidCursor(f"Invalid cursor: {cursor}")
+    if not 0 <= id <= MAX_CURSOR_ID:
+        raise InvalidCursor(f"Invalid cursor: {cursor}")
+
+    return rank, id
+
+
+def parse_query(text: str) -> SearchQuery:
+    """Split search text into full text terms and field-scoped filters
+
+    Terms such as email:foo, first:ann or name:"van der" become filters on
+    their columns. Unknown prefixes are left in the text. The remaining text is
+    passed to websearch_to_tsquery, which handles "quoted phrases", OR and
+    -excluded words.
 
     Args:
         text (str): Search text
 
     Returns:
-        List[models.Contact]: List of contacts found
+        SearchQuery: Full text terms and filters, sorted by field
+    """
+
+    filters = []
+
+    def take_filter(match: "re.Match[str]") -> str:
+        field = match["field"].lower()
+        field = FIELD_ALIASES.get(field, field)
+        if field not in FIELD_COLUMNS:
+            return match[0]
+
+        value = match["quoted"] if match["quoted"] is not None else match["value"]
+        if value.strip():
+            filters.append((field, value.strip()))
+        return " "
+
+    text = FIELD_TERM.sub(take_filter, text)
+
+    return SearchQuery(" ".join(text.split()), tuple(sorted(filters)))
+
+
+@functools.lru_cache(maxsize=SEARCH_SHAPES)
+def search_statement(
+    after_cursor: bool, has_text: bool = True, fields: Tuple[str, ...] = ()
+) -> Select:
+    """Build the ranked search statement of a query shape with bound parameters
+
+    Rows are ordered by ts_rank_cd and id, so the page after a given row is
+    selected with a keyset predicate instead of an OFFSET scan. The caller
+    fetches one extra row to find out whether a next page exists. Without full
+    text terms the rank is 0, and rows are in id order.
+
+    Statements are cached by shape, so every query with the same kinds of terms
+    shares one statement.
+
+    Parameters: text, one <field>_<position> pattern per filter, fetch (row
+    limit) and, after a cursor, last_rank and last_id.
+
+    Args:
+        after_cursor (bool): Add the keyset predicate of a following page
+        has_text (bool): Match the full text terms. Defaults to True.
+        fields (Tuple[str, ...]): Field of every filter. Defaults to ().
+
+    Returns:
+        Select: SQLAlchemy Core select statement
+    """
+
+    predicates = []
+
+    if has_text:
+        query = func.websearch_to_tsquery(TS_CONFIG, bindparam("text"))
+        rank = func.ts_rank_cd(models.Contact.search_vector, query)
+        predicates.append(models.Contact.search_vector.op("@@")(query))
+    else:
+        # Same type as ts_rank_cd, so the keyset parameters keep their type
+        rank = literal_column("0::real", Float)
+
+    for position, field in enumerate(fields, 1):
+        pattern = bindparam(f"{field}_{position}")
+        predicates.append(
+            or_(
+                *(
+                    column.ilike(pattern, escape=LIKE_ESCAPE)
+                    for column in FIELD_COLUMNS[field]
+                )
+            )
+        )
+
+    statement = select(*CONTACT_COLUMNS, rank.label("rank")).where(*predicates)
+
+    if after_cursor:
+        # ts_rank_cd returns real. Compared as float8, the rank of a tied row
+        # no longer equals itself and the row is skipped or repeated
+        last_rank = cast(bindparam("last_rank"), postgresql.REAL)
+        statement = statement.where(
+            or_(
+                rank < last_rank,
+                and_(rank == last_rank, models.Contact.id > bindparam("last_id")),
+            )
+        )
+
+    order_by = (rank.desc(),) if has_text else ()
+
+    return statement.order_by(*order_by, models.Contact.id.asc()).limit(
+        bindparam("fetch", type_=Integer)
+    )
+
+
+class CompiledQuery:
+    """A Core statement compiled once into asyncpg's positional SQL
+
+    asyncpg keeps a prepared statement per connection for every SQL string it
+    has run, so sending the same string each time skips both the SQLAlchemy
+    compilation that databases does per call and the server-side parse.
+    """
+
+    def __init__(self, statement: Select) -> None:
+        compiled = statement.compile(dialect=postgresql.dialect())
+        self.names = sorted(compiled.params)
+        # The default dialect renders %(name)s placeholders and escapes % as %%
+        self.sql = compiled.string % {
+            name: f"${position}" for position, name in enumerate(self.names, 1)
+        }
+
+    def args(self, params: Dict[str, Any]) -> List[Any]:
+        """Order parameter values by their placeholder position
+
+        Args:
+            params (Dict[str, Any]): Values by parameter name
+
+        Returns:
+            List[Any]: Positional arguments for asyncpg
+        """
+
+        return [params[name] for name in self.names]
+
+
+@functools.lru_cache(maxsize=SEARCH_SHAPES)
+def compiled_search_query(
+    after_cursor: bool, has_text: bool = True, fields: Tuple[str, ...] = ()
+) -> CompiledQuery:
+    """Compile the search statement of a query shape once
+
+    The hot path then only binds values: the sync engine finds the compiled
+    form in its statement cache and asyncpg reuses its prepared statement.
+
+    Args:
+        after_cursor (bool): Add the keyset predicate of a following page
+        has_text (bool): Match the full text terms. Defaults to True.
+        fields (Tuple[str, ...]): Field of every filter. Defaults to ().
+
+    Returns:
+        CompiledQuery: Positional SQL of the statement
+    """
+
+    return CompiledQuery(search_statement(after_cursor, has_text, fields))
+
+
+def _search_params(
+    query: SearchQuery, limit: int, cursor: Optional[str]
+) -> Dict[str, Any]:
+    """Bind the values of one page for the search statement of a query
+
+    Args:
+        query (SearchQuery): Parsed search text
+        limit (int): Page size
+        cursor (Optional[str]): Cursor of the previous page
+
+    Raises:
+        InvalidCursor: If the cursor is malformed
+
+    Returns:
+        Dict[str, Any]: Values by parameter name
+    """
+
+    params: Dict[str, Any] = {"fetch": limit + 1}
+
+    if query.has_text:
+        params["text"] = query.text
+
+    for position, (field, value) in enumerate(query.filters, 1):
+        params[f"{field}_{position}"] = f"%{_escape_like(value)}%"
+
+    if cursor:
+        params["last_rank"], params["last_id"] = decode_cursor(cursor)
+
+    return params
+
+
+def _build_page(rows: Sequence[Any], limit: int) -> Dict[str, Any]:
+    """Convert fetched rows into a page of results with the next cursor
+
+    Args:
+        rows (Sequence[Any]): SQLAlchemy rows or asyncpg records with the contact
+            columns and the rank, fetched with one extra row over the limit
+        limit (int): Page size
+
+    Returns:
+        Dict[str, Any]: Page with "results" and "next_cursor"
     """
 
-    results = (
-        session.query(
-            models.Contact.id,
-            models.Contact.nimbus_id,
-            models.Contact.first_name,
-            models.Contact.last_name,
-            models.Contact.email,
-            models.Contact.description,
+    # rank is the last column, so zipping with the contact keys drops it
+    results = [dict(zip(CONTACT_KEYS, row)) for row in rows[:limit]]
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last[-1], last[0])
+
+    return {"results": results, "next_cursor": next_cursor}
+
+
+def full_text_search(
+    session: database.SessionLocal,
+    text: str,
+    limit: int = DEFAULT_LIMIT,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Execute full text search query
+
+    Args:
+        session (SessionLocal): Database session
+        text (str): Search text, see parse_query
+        limit (int): Page size. Defaults to DEFAULT_LIMIT.
+        cursor (Optional[str]): Cursor of the previous page. Defaults to None.
+
+    Returns:
+        Dict[str, Any]: Page of contacts found, ordered by rank
+    """
+
+    query = parse_query(text)
+    statement = search_statement(bool(cursor), query.has_text, query.fields)
+    params = _search_params(query, limit, cursor)
+
+    def load() -> Dict[str, Any]:
+        with SEARCH_SECONDS.labels("sync").time():
+            rows = session.execute(statement, params).all()
+        return _build_page(rows, limit)
+
+    return search_cache.get_or_load(search_cache.key(text, limit, cursor), load)
+
+
+async def async_full_text_search(
+    db: databases.Database,
+    text: str,
+    limit: int = DEFAULT_LIMIT,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Execute full text search query on the shared asyncpg pool
+
+    The precompiled SQL is run on the raw asyncpg connection, so it is
+    prepared once per pooled connection.
+
+    Args:
+        db (databases.Database): Connected database pool
+        text (str): Search text, see parse_query
+        limit (int): Page size. Defaults to DEFAULT_LIMIT.
+        cursor (Optional[str]): Cursor of the previous page. Defaults to None.
+
+    Returns:
+        Dict[str, Any]: Page of contacts found, ordered by rank
+    """
+
+    query = parse_query(text)
+    compiled = compiled_search_query(bool(cursor), query.has_text, query.fields)
+    args = compiled.args(_search_params(query, limit, cursor))
+
+    async def load() -> Dict[str, Any]:
+        with SEARCH_SECONDS.labels("async").time():
+            async with db.connection() as connection:
+                rows = await connection.raw_connection.fetch(compiled.sql, *args)
+        return _build_page(rows, limit)
+
+    return await search_cache.aget_or_load(search_cache.key(text, limit, cursor), load)
+
+
+def _escape_like(value: str) -> str:
+    """Escape LIKE wildcards so user input only matches literally
+
+    Args:
+        value (str): Raw user input
+
+    Returns:
+        str: Input with LIKE_ESCAPE, % and _ escaped by LIKE_ESCAPE
+    """
+
+    for char in (LIKE_ESCAPE, "%", "_"):
+        value = value.replace(char, LIKE_ESCAPE + char)
+
+    return value
+
+
+def _suggest_statement(prefix: str, limit: int) -> Select:
+    """Build the typeahead statement matching name and email prefixes
+
+    Every word of the input must be a prefix of the first name, last name or
+    email. The ILIKE predicates are served by the pg_trgm GIN indexes, which is
+    why inputs shorter than MIN_SUGGEST_LENGTH are not looked up. The closest
+    matches by trigram similarity come first.
+
+    Args:
+        prefix (str): Normalized user input
+        limit (int): Maximum number of suggestions
+
+    Returns:
+        Select: SQLAlchemy Core select statement
+    """
+
+    columns = (
+        models.Contact.first_name,
+        models.Contact.last_name,
+        models.Contact.email,
+    )
+
+    statement = select(
+        models.Contact.id,
+        models.Contact.first_name,
+        models.Contact.last_name,
+        models.Contact.email,
+    )
+
+    for word in prefix.split():
+        pattern = f"{_escape_like(word)}%"
+        statement = statement.where(
+            or_(*(column.ilike(pattern, escape=LIKE_ESCAPE) for column in columns))
         )
-        .filter(models.Contact.search_vector.op("@@")(func.plainto_tsquery(text)))
-        .all()
+
+    similarity = func.greatest(
+        *(func.similarity(func.coalesce(column, ""), prefix) for column in columns)
     )
 
-    return results
+    return statement.order_by(similarity.desc(), models.Contact.id).limit(limit)
+
+
+async def async_suggest(
+    db: databases.Database, prefix: str, limit: int = SUGGEST_LIMIT
+) -> List[Dict[str, Any]]:
+    """Return the top contacts whose names or email start with the given text
+
+    Results are kept in a small in-process cache with a short TTL, since the
+    same prefixes arrive at keystroke rate.
+
+    Args:
+        db (databases.Database): Connected database pool
+        prefix (str): User input
+        limit (int): Maximum number of suggestions. Defaults to SUGGEST_LIMIT.
+
+    Returns:
+        List[Dict[str, Any]]: Matching contacts
+    """
+
+    prefix = normalize_query(prefix)
+    if len(prefix) < MIN_SUGGEST_LENGTH:
+        return []
+
+    key = f"{prefix}:{limit}"
+    suggestions = suggest_cache.get(key)
+
+    if suggestions is None:
+        rows = await db.fetch_all(_suggest_statement(prefix, limit))
+        suggestions = [dict(row._mapping) for row in rows]
+        suggest_cache.set(key, suggestions)
+
+    return suggestions
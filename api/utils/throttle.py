@@ -0,0 +1,218 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+import redis
+from redis import asyncio as aioredis
+
+from .cache import REDIS_RETRY_AFTER_SECONDS, REDIS_TIMEOUT_SECONDS, REDIS_URL
+from .metrics import NIMBUS_CIRCUIT, NIMBUS_THROTTLE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+NIMBUS_RATE_LIMIT_REDIS_URL = os.getenv("NIMBUS_RATE_LIMIT_REDIS_URL", REDIS_URL)
+# Requests per second shared by every worker, and how many may be sent at once
+# after an idle period
+NIMBUS_RATE_LIMIT = float(os.getenv("NIMBUS_RATE_LIMIT", "10"))
+NIMBUS_RATE_BURST = int(os.getenv("NIMBUS_RATE_BURST", "20"))
+
+NIMBUS_BREAKER_THRESHOLD = int(os.getenv("NIMBUS_BREAKER_THRESHOLD", "5"))
+NIMBUS_BREAKER_RESET_SECONDS = float(os.getenv("NIMBUS_BREAKER_RESET_SECONDS", "60"))
+
+# Reserves one token and returns how long the caller must wait for it. Tokens
+# may go negative, so concurrent callers queue up instead of polling. The Redis
+# clock is used, so workers on different hosts agree on the refill.
+RESERVE_TOKEN_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or capacity
+local updated_at = tonumber(bucket[2]) or now
+
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate) - 1
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+redis.call('EXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate) + 1)
+
+if tokens >= 0 then
+    return '0'
+end
+return tostring(-tokens / rate)
+"""
+
+
+class TokenBucket:
+    """Token bucket rate limiter shared through Redis
+
+    Every worker process reserves its tokens from the same Redis key, so the
+    rate holds across the whole Celery deployment. A Redis outage falls back to
+    an in-process bucket with the same settings until Redis is retried.
+    """
+
+    key_prefix = "rate-limit"
+
+    def __init__(
+        self,
+        name: str,
+        rate: float = NIMBUS_RATE_LIMIT,
+        capacity: int = NIMBUS_RATE_BURST,
+        redis_url: Optional[str] = NIMBUS_RATE_LIMIT_REDIS_URL,
+    ) -> None:
+        self.key = f"{self.key_prefix}:{name}"
+        self.rate = rate
+        self.capacity = capacity
+        self.redis_url = redis_url
+        self._aredis: Optional[aioredis.Redis] = None
+        self._redis_down_until = 0.0
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _redis_available(self) -> bool:
+        return bool(self.redis_url) and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, e: Exception) -> None:
+        logger.warning(f"[!] Rate limit Redis is unavailable: {e}")
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_AFTER_SECONDS
+
+    def _get_aredis(self) -> aioredis.Redis:
+        if self._aredis is None:
+            assert self.redis_url is not None
+            self._aredis = aioredis.Redis.from_url(
+                self.redis_url, socket_timeout=REDIS_TIMEOUT_SECONDS
+            )
+        return self._aredis
+
+    async def aclose(self) -> None:
+        """Close the asyncio Redis client, which is bound to the running loop"""
+
+        if self._aredis is not None:
+            await self._aredis.close()
+            self._aredis = None
+
+    def reserve_local(self) -> float:
+        """Reserve a token from the in-process bucket
+
+        Returns:
+            float: Seconds to wait before the token may be used
+        """
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated_at) * self.rate
+            )
+            self._updated_at = now
+            self._tokens -= 1
+
+            return max(0.0, -self._tokens / self.rate)
+
+    async def areserve(self) -> float:
+        """Reserve a token from the shared bucket
+
+        Returns:
+            float: Seconds to wait before the token may be used
+        """
+
+        if not self._redis_available():
+            return self.reserve_local()
+
+        try:
+            wait = await self._get_aredis().eval(
+                RESERVE_TOKEN_SCRIPT, 1, self.key, self.rate, self.capacity
+            )
+        except redis.RedisError as e:
+            self._redis_failed(e)
+            return self.reserve_local()
+
+        return float(wait)
+
+    async def aacquire(self) -> None:
+        """Wait without blocking the event loop until a token is available"""
+
+        wait = await self.areserve()
+        NIMBUS_THROTTLE_SECONDS.observe(wait)
+        if wait:
+            await asyncio.sleep(wait)
+
+
+class CircuitBreaker:
+    """Fail fast while a remote service keeps failing
+
+    After failure_threshold consecutive failures the breaker opens and callers
+    are rejected without a request. Once reset_timeout has passed, a single
+    trial request is let through (half open): a success closes the breaker, a
+    failure opens it again. If the trial never reports back, another one is let
+    through after reset_timeout.
+
+    The state is kept per process, so a worker stops calling the service as
+    soon as it sees the failures itself.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = NIMBUS_BREAKER_THRESHOLD,
+        reset_timeout: float = NIMBUS_BREAKER_RESET_SECONDS,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def _transition(self, state: str) -> None:
+        if state != self.state:
+            logger.warning(f"[!] Nimbus circuit breaker is {state.replace('_', ' ')}")
+            NIMBUS_CIRCUIT.labels(state).inc()
+        self.state = state
+
+    @property
+    def is_open(self) -> bool:
+        """Whether requests are currently being rejected, without claiming a trial"""
+
+        return self.state != self.CLOSED
+
+    def allow(self) -> bool:
+        """Check whether a request may be sent
+
+        Returns:
+            bool: True when closed, or for the trial request once reset_timeout
+                has passed
+        """
+
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+
+            self._opened_at = time.monotonic()
+            self._transition(self.HALF_OPEN)
+            return True
+
+    def record_success(self) -> None:
+        """Close the breaker and reset the failure count"""
+
+        with self._lock:
+            self.failures = 0
+            self._transition(self.CLOSED)
+
+    def record_failure(self) -> None:
+        """Count a failure, opening the breaker at the threshold or after a trial"""
+
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._transition(self.OPEN)
@@ -0,0 +1,64 @@
+"""Throughput of the CSV bulk import
+
+Generates a synthetic CSV file of each requested size and loads it into an
+empty schema with the same COPY path used by import_initial_data:
+
+    python -m benchmarks.bench_import --rows 10000 1000000 10000000
+"""
+
+import argparse
+import os
+from typing import Any, Dict, List
+
+from api import load
+from benchmarks.common import (
+    Timer,
+    disable_search_cache,
+    make_engine,
+    reset_schema,
+    write_csv,
+    write_results,
+)
+
+
+def run(rows: int, chunk_size: int) -> Dict[str, Any]:
+    engine = make_engine()
+    reset_schema(engine)
+
+    path = write_csv(rows)
+    try:
+        with Timer() as timer:
+            stats = load.bulk_import_csv(path, chunk_size=chunk_size, bind=engine)
+    finally:
+        os.remove(path)
+        engine.dispose()
+
+    result = {
+        "rows": stats["rows"],
+        "chunk_size": chunk_size,
+        "seconds": round(timer.seconds, 3),
+        "rows_per_second": round(stats["rows"] / timer.seconds, 1),
+    }
+    print(
+        f"{rows:>10} rows  {result['seconds']:9.3f} s  "
+        f"{result['rows_per_second']:12.1f} rows/sec"
+    )
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--chunk-size", type=int, default=load.DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--output", help="Path of the JSON results file")
+    args = parser.parse_args()
+
+    disable_search_cache()
+
+    results: List[Dict[str, Any]] = [run(rows, args.chunk_size) for rows in args.rows]
+
+    write_results("import", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
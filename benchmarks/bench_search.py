@@ -0,0 +1,106 @@
+"""Latency percentiles of full_text_search across query shapes
+
+Seeds a synthetic contact book of each requested size, then runs every query
+shape repeatedly with the search cache disabled:
+
+    python -m benchmarks.bench_search --rows 10000 1000000 --iterations 200
+"""
+
+import argparse
+from typing import Any, Callable, Dict, List
+
+from sqlalchemy.orm import Session
+
+from api.utils import search
+from api.utils.database import SessionLocal
+from benchmarks.common import (
+    COMMON_WORDS,
+    FIRST_NAMES,
+    RARE_WORDS,
+    Timer,
+    disable_search_cache,
+    make_engine,
+    percentiles,
+    seed_contacts,
+    write_results,
+)
+
+DEEP_PAGES = 10
+
+
+def first_page(text: str) -> Callable[[Session], Any]:
+    def run(session: Session) -> Any:
+        return search.full_text_search(session=session, text=text)
+
+    return run
+
+
+def deep_pages(text: str, pages: int = DEEP_PAGES) -> Callable[[Session], Any]:
+    def run(session: Session) -> Any:
+        cursor = None
+        for _ in range(pages):
+            page = search.full_text_search(session=session, text=text, cursor=cursor)
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+    return run
+
+
+QUERY_SHAPES: Dict[str, Callable[[Session], Any]] = {
+    "common_word": first_page(COMMON_WORDS[0]),
+    "rare_word": first_page(RARE_WORDS[0]),
+    "two_words": first_page(f"{COMMON_WORDS[0]} {COMMON_WORDS[1]}"),
+    "first_name": first_page(FIRST_NAMES[0]),
+    "no_match": first_page("nonexistent"),
+    f"common_word_{DEEP_PAGES}_pages": deep_pages(COMMON_WORDS[0]),
+}
+
+
+def run(rows: int, iterations: int, reuse: bool) -> List[Dict[str, Any]]:
+    engine = make_engine()
+    seed_contacts(engine, rows, reuse=reuse)
+
+    results = []
+    with SessionLocal() as session:
+        for shape, query in QUERY_SHAPES.items():
+            query(session)
+
+            samples = []
+            for _ in range(iterations):
+                with Timer() as timer:
+                    query(session)
+                samples.append(timer.seconds)
+
+            summary = percentiles(samples)
+            results.append({"rows": rows, "shape": shape, **summary})
+            print(
+                f"{rows:>10} rows  {shape:<22} p50 {summary['p50_ms']:9.3f} ms  "
+                f"p95 {summary['p95_ms']:9.3f} ms  p99 {summary['p99_ms']:9.3f} ms"
+            )
+
+    engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument(
+        "--reuse", action="store_true", help="Keep a table that already has the size"
+    )
+    parser.add_argument("--output", help="Path of the JSON results file")
+    args = parser.parse_args()
+
+    disable_search_cache()
+
+    results = []
+    for rows in args.rows:
+        results.extend(run(rows, args.iterations, args.reuse))
+
+    write_results("search", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
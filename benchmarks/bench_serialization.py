@@ -0,0 +1,127 @@
+"""Compare the search response serialization paths
+
+The previous path converted every row with dict(row), validated the page
+against response_model and encoded it with the standard library. The fast
+path zips column values into dicts and encodes them with orjson.
+
+Rows come from an in-memory SQLite table, so the benchmark runs without the
+compose services:
+
+    python -m benchmarks.bench_serialization
+"""
+
+import argparse
+import asyncio
+import timeit
+from typing import Any, Callable, Dict, List, Sequence
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import create_engine, text
+
+from api.utils import schema, search
+from benchmarks.common import write_results
+
+SIZES = (10, 1_000, 100_000)
+
+
+def fetch_rows(size: int) -> Sequence[Any]:
+    """Build a result set shaped like the search statement
+
+    Args:
+        size (int): Number of rows
+
+    Returns:
+        Sequence[Any]: SQLAlchemy rows with the contact columns and a rank
+    """
+
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "CREATE TABLE contact (id INTEGER PRIMARY KEY, nimbus_id TEXT, "
+                "first_name TEXT, last_name TEXT, email TEXT, description TEXT, "
+                "rank REAL)"
+            )
+        )
+        connection.execute(
+            text(
+                "INSERT INTO contact VALUES (:id, :nimbus_id, :first_name, "
+                ":last_name, :email, :description, :rank)"
+            ),
+            [
+                {
+                    "id": i,
+                    "nimbus_id": str(1_000_000 + i),
+                    "first_name": f"First{i}",
+                    "last_name": f"Last{i}",
+                    "email": f"contact{i}@example.com",
+                    "description": "Business contact met at the annual conference",
+                    "rank": 1 / i,
+                }
+                for i in range(1, size + 1)
+            ],
+        )
+        return connection.execute(
+            text(f"SELECT {', '.join(search.CONTACT_KEYS)}, rank FROM contact")
+        ).all()
+
+
+def legacy_page(rows: Sequence[Any]) -> Dict[str, Any]:
+    results: List[Dict[str, Any]] = []
+    for row in rows:
+        contact = dict(row._mapping)
+        contact.pop("rank")
+        results.append(contact)
+    return {"results": results, "next_cursor": None}
+
+
+def run(size: int, number: int) -> Dict[str, Any]:
+    rows = fetch_rows(size)
+    field = create_response_field(name="response", type_=schema.SearchResults)
+    loop = asyncio.new_event_loop()
+
+    def validated() -> bytes:
+        content = loop.run_until_complete(
+            serialize_response(field=field, response_content=legacy_page(rows))
+        )
+        return JSONResponse(content).body
+
+    def fast() -> bytes:
+        return ORJSONResponse(search._build_page(rows, len(rows))).body
+
+    paths: Dict[str, Callable[[], bytes]] = {"validated": validated, "orjson": fast}
+    timings = {
+        name: min(timeit.repeat(path, number=number, repeat=3)) / number
+        for name, path in paths.items()
+    }
+    loop.close()
+
+    speedup = timings["validated"] / timings["orjson"]
+    print(
+        f"{size:>7} rows  validated {timings['validated'] * 1000:9.3f} ms  "
+        f"orjson {timings['orjson'] * 1000:9.3f} ms  x{speedup:.1f}"
+    )
+    return {
+        "rows": size,
+        "validated_ms": round(timings["validated"] * 1000, 3),
+        "orjson_ms": round(timings["orjson"] * 1000, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=SIZES, help="Result set sizes"
+    )
+    parser.add_argument("--output", help="Path of the JSON results file")
+    args = parser.parse_args()
+
+    results = [run(size, number=max(1, 10_000 // size)) for size in args.sizes]
+
+    write_results("serialization", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Compare the per-call Python overhead of building the search statement
+
+The previous path built a new select() for every call. The sync engine then
+generated its cache key to find the compiled form, and databases compiled it
+again for asyncpg on every call. The precompiled path parses the query and
+only binds values to the statement cached for its shape.
+
+Only the Python side is measured, so the benchmark runs without the compose
+services:
+
+    python -m benchmarks.bench_statement
+"""
+
+import argparse
+import timeit
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql import Select
+
+from api.utils import models, search
+from benchmarks.common import write_results
+
+DIALECT = postgresql.dialect()
+
+
+def legacy_statement(text: str, limit: int, cursor: Optional[str]) -> Select:
+    query = func.plainto_tsquery(text)
+    rank = func.ts_rank_cd(models.Contact.search_vector, query)
+
+    statement = select(*search.CONTACT_COLUMNS, rank.label("rank")).where(
+        models.Contact.search_vector.op("@@")(query)
+    )
+
+    if cursor:
+        last_rank, last_id = search.decode_cursor(cursor)
+        statement = statement.where(
+            or_(
+                rank < last_rank,
+                and_(rank == last_rank, models.Contact.id > last_id),
+            )
+        )
+
+    return statement.order_by(rank.desc(), models.Contact.id.asc()).limit(limit + 1)
+
+
+def databases_compile(statement: Select) -> List[Any]:
+    # What databases does for every query on the asyncpg backend
+    compiled = statement.compile(
+        dialect=DIALECT, compile_kwargs={"render_postcompile": True}
+    )
+    params = sorted(compiled.params.items())
+    mapping = {name: f"${position}" for position, (name, _) in enumerate(params, 1)}
+    return [compiled.string % mapping, *(value for _, value in params)]
+
+
+def run(cursor: Optional[str], number: int) -> Dict[str, Any]:
+    text, limit = "business partner", search.DEFAULT_LIMIT
+    after_cursor = bool(cursor)
+
+    def sync_legacy() -> Any:
+        return legacy_statement(text, limit, cursor)._generate_cache_key()
+
+    def sync_precompiled() -> Any:
+        query = search.parse_query(text)
+        search._search_params(query, limit, cursor)
+        statement = search.search_statement(after_cursor, query.has_text, query.fields)
+        return statement._generate_cache_key()
+
+    def async_legacy() -> Any:
+        return databases_compile(legacy_statement(text, limit, cursor))
+
+    def async_precompiled() -> Any:
+        query = search.parse_query(text)
+        compiled = search.compiled_search_query(
+            after_cursor, query.has_text, query.fields
+        )
+        return compiled.args(search._search_params(query, limit, cursor))
+
+    paths: Dict[str, Callable[[], Any]] = {
+        "sync_legacy": sync_legacy,
+        "sync_precompiled": sync_precompiled,
+        "async_legacy": async_legacy,
+        "async_precompiled": async_precompiled,
+    }
+    timings = {
+        name: min(timeit.repeat(path, number=number, repeat=3)) / number
+        for name, path in paths.items()
+    }
+
+    page = "next page" if cursor else "first page"
+    for mode in ("sync", "async"):
+        legacy, precompiled = timings[f"{mode}_legacy"], timings[f"{mode}_precompiled"]
+        print(
+            f"{page:>10} {mode:>5}  legacy {legacy * 1e6:8.1f} us  "
+            f"precompiled {precompiled * 1e6:8.1f} us  x{legacy / precompiled:.1f}"
+        )
+
+    return {
+        "page": page,
+        **{f"{name}_us": round(seconds * 1e6, 2) for name, seconds in timings.items()},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=2_000, help="Calls per timing")
+    parser.add_argument("--output", help="Path of the JSON results file")
+    args = parser.parse_args()
+
+    cursors = (None, search.encode_cursor(0.5, 42))
+    results = [run(cursor, number=args.number) for cursor in cursors]
+
+    write_results("statement", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
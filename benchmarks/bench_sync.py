@@ -0,0 +1,99 @@
+"""Wall time of task_update_contacts against the stub Nimbus server
+
+For each size, seeds a fresh contact book, runs a full reconcile and then an
+incremental sync from the watermark it recorded. Tasks run eagerly, so the
+shards of the full reconcile run one after the other in this process and the
+timing is the total work of a run:
+
+    python -m benchmarks.bench_sync --rows 10000 100000 --latency-ms 50 --error-rate 0.01
+"""
+
+import argparse
+from typing import Any, Dict, List
+
+from api import tasks
+from api.utils import nimbus, throttle
+from benchmarks.common import (
+    Timer,
+    disable_search_cache,
+    make_engine,
+    seed_contacts,
+    write_results,
+)
+from benchmarks.stub_nimbus import StubNimbus
+
+# Requests per second that the stub can never reach, so the token bucket does not
+# wait and the timings show the sync itself
+UNTHROTTLED_RATE = 1e9
+
+
+def run(rows: int, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    engine = make_engine()
+    seed_contacts(engine, rows)
+
+    stub = StubNimbus(
+        rows=rows,
+        match_rate=args.match_rate,
+        changed=args.changed,
+        latency_ms=args.latency_ms,
+        error_rate=args.error_rate,
+    )
+    nimbus.BASE_URL = stub.base_url
+    # Every run must reach the stub, not the Nimbus response cache, and must not
+    # be held back by the production rate limit
+    nimbus.NIMBUS_CACHE_REDIS_URL = None
+    throttle.NIMBUS_RATE_LIMIT_REDIS_URL = None
+    throttle.NIMBUS_RATE_LIMIT = UNTHROTTLED_RATE
+
+    results = []
+    with stub:
+        for mode in ("full", "incremental"):
+            stub.requests = stub.errors = 0
+
+            with Timer() as timer:
+                outcome = tasks.task_update_contacts(full=mode == "full")
+                if outcome["status"] == "dispatched":
+                    outcome = tasks.celery.AsyncResult(outcome["result_id"]).get()
+
+            result = {
+                "rows": rows,
+                "mode": outcome["mode"],
+                "status": outcome["status"],
+                "seconds": round(timer.seconds, 3),
+                "requests": stub.requests,
+                "errors": stub.errors,
+                **{k: v for k, v in outcome.items() if isinstance(v, int)},
+            }
+            results.append(result)
+            print(
+                f"{rows:>10} rows  {result['mode']:<12} {result['seconds']:9.3f} s  "
+                f"{result['requests']:>7} requests  {result['errors']:>5} errors"
+            )
+
+    engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000])
+    parser.add_argument("--match-rate", type=float, default=0.8)
+    parser.add_argument("--changed", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--output", help="Path of the JSON results file")
+    args = parser.parse_args()
+
+    disable_search_cache()
+    tasks.celery.conf.task_always_eager = True
+    tasks.celery.conf.task_store_eager_result = True
+
+    results = []
+    for rows in args.rows:
+        results.extend(run(rows, args))
+
+    write_results("sync", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Compare two benchmark result files
+
+Cases are matched on their parameters (rows, shape, mode...) and every timing
+metric is reported as a relative change. The exit status is 1 when a metric
+regressed by more than the threshold, so the script can gate a CI job:
+
+    python -m benchmarks.compare results/search-abc123.json results/search-def456.json
+"""
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Tuple
+
+# Fields identifying a measured case across runs
+CASE_FIELDS = ("rows", "shape", "mode", "chunk_size")
+# Metrics where a larger value is better; every other metric is a duration
+HIGHER_IS_BETTER = {"rows_per_second"}
+METRIC_SUFFIXES = ("_ms", "seconds", "rows_per_second")
+
+
+def is_metric(key: str) -> bool:
+    return key.endswith(METRIC_SUFFIXES)
+
+
+def case_key(result: Dict[str, Any]) -> Tuple[Tuple[str, Any], ...]:
+    return tuple((key, result[key]) for key in CASE_FIELDS if key in result)
+
+
+def compare(
+    baseline: List[Dict[str, Any]], candidate: List[Dict[str, Any]], threshold: float
+) -> bool:
+    """Print the relative change of every metric
+
+    Args:
+        baseline (List[Dict[str, Any]]): Results of the reference run
+        candidate (List[Dict[str, Any]]): Results of the run to check
+        threshold (float): Allowed slowdown, e.g. 0.1 for 10%
+
+    Returns:
+        bool: True if any metric regressed by more than the threshold
+    """
+
+    reference = {case_key(result): result for result in baseline}
+    regressed = False
+
+    for result in candidate:
+        key = case_key(result)
+        previous = reference.get(key)
+        if previous is None:
+            continue
+
+        label = " ".join(f"{k}={v}" for k, v in key)
+        for metric, value in result.items():
+            if not is_metric(metric) or not previous.get(metric):
+                continue
+
+            change = (value - previous[metric]) / previous[metric]
+            if metric in HIGHER_IS_BETTER:
+                change = -change
+
+            marker = ""
+            if change > threshold:
+                marker = "  REGRESSION"
+                regressed = True
+
+            print(
+                f"{label:<40} {metric:<16} {previous[metric]:>12} -> {value:>12} "
+                f"({change:+.1%}){marker}"
+            )
+
+    return regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline", help="Results of the reference commit")
+    parser.add_argument("candidate", help="Results of the commit to check")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="Allowed slowdown ratio"
+    )
+    args = parser.parse_args()
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)["results"]
+    with open(args.candidate) as file:
+        candidate = json.load(file)["results"]
+
+    sys.exit(1 if compare(baseline, candidate, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Local stand-in for the Nimbus contacts API
+
+Serves the requests made by NimbusAPIClient and AsyncNimbusAPIClient with
+synthetic records that line up with benchmarks.common.synthetic_contacts, and
+adds a configurable latency and error rate to every response. Point the
+clients at it with NIMBUS_BASE_URL, or run it on its own:
+
+    python -m benchmarks.stub_nimbus --rows 100000 --latency-ms 50 --error-rate 0.01
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.common import contact_email
+
+CONTACTS_PATH = "/api/v1/contacts"
+PAGE_SIZE = 100
+NIMBUS_ID_OFFSET = 1_000_000
+
+
+class StubNimbus:
+    """Synthetic Nimbus dataset and the HTTP server exposing it
+
+    Args:
+        rows (int): Number of synthetic contacts on the local side
+        match_rate (float): Share of local contacts that also exist in Nimbus
+        changed (int): Number of records returned by an "updated since" query
+        latency_ms (float): Delay added to every response
+        error_rate (float): Share of requests answered with HTTP 503
+        port (int): Port to listen on, 0 picks a free one
+    """
+
+    def __init__(
+        self,
+        rows: int,
+        match_rate: float = 0.8,
+        changed: int = 1000,
+        latency_ms: float = 0.0,
+        error_rate: float = 0.0,
+        port: int = 0,
+        seed: int = 0,
+    ) -> None:
+        self.rows = rows
+        self.match_rate = match_rate
+        self.changed = min(changed, rows)
+        self.latency = latency_ms / 1000
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}{CONTACTS_PATH}"
+
+    def exists(self, index: int) -> bool:
+        return 1 <= index <= self.rows and index % 100 < self.match_rate * 100
+
+    def record(self, index: int) -> Dict[str, Any]:
+        return {
+            "id": str(NIMBUS_ID_OFFSET + index),
+            "fields": {
+                "first name": [{"value": f"Remote{index}"}],
+                "last name": [{"value": "Contact"}],
+                "email": [{"value": contact_email(index)}],
+            },
+        }
+
+    def page(self, indexes: List[int], page: int) -> Dict[str, Any]:
+        start = (page - 1) * PAGE_SIZE
+        pages = max(1, -(-len(indexes) // PAGE_SIZE))
+        return {
+            "resources": [self.record(i) for i in indexes[start : start + PAGE_SIZE]],
+            "meta": {"page": page, "pages": pages, "total": len(indexes)},
+        }
+
+    def list_contacts(self, query: Dict[str, Any], page: int) -> Dict[str, Any]:
+        if "updated" in query:
+            step = max(1, self.rows // max(1, self.changed))
+            indexes = list(range(1, self.rows + 1, step))[: self.changed]
+            return self.page([i for i in indexes if self.exists(i)], page)
+
+        clauses = query.get("or", [query])
+        indexes = []
+        for clause in clauses:
+            email = clause.get("email", {}).get("is", "")
+            number = email.removeprefix("contact").split("@")[0]
+            if number.isdigit() and self.exists(int(number)):
+                indexes.append(int(number))
+
+        return self.page(indexes, page)
+
+    def get_contacts(self, ids: str) -> Dict[str, Any]:
+        indexes = [int(id) - NIMBUS_ID_OFFSET for id in ids.split(",") if id.isdigit()]
+        return {
+            "resources": [self.record(i) for i in indexes if self.exists(i)],
+            "meta": {},
+        }
+
+    def _handler(self) -> type:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+            def send_json(self, status: int, body: Dict[str, Any]) -> None:
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                if status == 503:
+                    self.send_header("Retry-After", "0")
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self) -> None:
+                with stub._lock:
+                    stub.requests += 1
+                    failed = stub.random.random() < stub.error_rate
+                    stub.errors += failed
+
+                if stub.latency:
+                    time.sleep(stub.latency)
+                if failed:
+                    return self.send_json(503, {"error": "unavailable"})
+
+                url = urlparse(self.path)
+                if url.path == CONTACTS_PATH:
+                    params = parse_qs(url.query)
+                    query = json.loads(params.get("query", ["{}"])[0])
+                    page = int(params.get("page", ["1"])[0])
+                    return self.send_json(200, stub.list_contacts(query, page))
+
+                if url.path.startswith(CONTACTS_PATH + "/"):
+                    ids = url.path[len(CONTACTS_PATH) + 1 :]
+                    return self.send_json(200, stub.get_contacts(ids))
+
+                self.send_json(404, {"error": "not found"})
+
+        return Handler
+
+    def start(self) -> "StubNimbus":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "StubNimbus":
+        return self.start()
+
+    def __exit__(self, *args: Any) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the stub Nimbus API server")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--match-rate", type=float, default=0.8)
+    parser.add_argument("--changed", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=8089)
+    args = parser.parse_args()
+
+    stub = StubNimbus(
+        rows=args.rows,
+        match_rate=args.match_rate,
+        changed=args.changed,
+        latency_ms=args.latency_ms,
+        error_rate=args.error_rate,
+        port=args.port,
+    )
+    print(f"[+] Stub Nimbus API listening on {stub.base_url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        stub.server.server_close()
+
+
+if __name__ == "__main__":
+    main()